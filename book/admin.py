@@ -1,15 +1,22 @@
 from django.contrib import admin
-from .models import  Book, BookCopy, BorrowRecord
+from .models import  Book, BookCopy, BorrowRecord, Hold, LateFeeEntry, Topic
 
 
 @admin.register(Book)
 class BookAdmin(admin.ModelAdmin):
-    list_display = ['title', 'author', 'publication_year', 'isbn', 'total_copies', 'language']
+    list_display = ['title', 'author', 'publication_year', 'isbn', 'total_copies', 'available_count', 'language']
     list_filter = ['publication_year', 'language']
     search_fields = ['title', 'topics', 'author']
     ordering = ['-publication_year',]
 
 
+@admin.register(Topic)
+class TopicAdmin(admin.ModelAdmin):
+    list_display = ['name', 'normalized']
+    search_fields = ['normalized']
+    ordering = ['normalized',]
+
+
 @admin.register(BookCopy)
 class BookCopyAdmin(admin.ModelAdmin):
     list_display = ['book', 'status']
@@ -25,4 +32,27 @@ class BorrowRecordAdmin(admin.ModelAdmin):
     list_filter = ['due_date', 'return_date']
     search_fields = ['user__email', 'book_copy__book__title']
     ordering = ['-borrow_date',]
-    readonly_fields = ['borrow_date', 'late_fee', 'fee_paid']
\ No newline at end of file
+    readonly_fields = ['borrow_date', 'late_fee', 'fee_paid']
+
+
+@admin.register(LateFeeEntry)
+class LateFeeEntryAdmin(admin.ModelAdmin):
+    list_display = ['borrow_record', 'reason', 'amount', 'balance', 'created_at']
+    list_filter = ['reason', 'created_at']
+    search_fields = ['borrow_record__user__email', 'borrow_record__book_copy__book__title']
+    ordering = ['-created_at',]
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Hold)
+class HoldAdmin(admin.ModelAdmin):
+    list_display = ['user', 'book', 'status', 'book_copy', 'created_at', 'expires_at']
+    list_filter = ['status']
+    search_fields = ['user__email', 'book__title']
+    ordering = ['-created_at',]
+    raw_id_fields = ['user', 'book', 'book_copy']
@@ -7,3 +7,6 @@ class BookConfig(AppConfig):
     
     def ready(self):
         import book.signals
+        from django.db.models.signals import post_migrate
+        from .search import ensure_sqlite_fts
+        post_migrate.connect(ensure_sqlite_fts, sender=self)
@@ -0,0 +1,124 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from rest_framework.response import Response
+
+
+LIST_VERSION_KEY = 'catalog:version:books'
+COPY_LIST_VERSION_KEY = 'catalog:version:copies'
+BOOK_VERSION_KEY = 'catalog:version:book:{}'
+VALIDATOR_HEADERS = ('ETag', 'Last-Modified')
+
+
+def catalog_cache():
+    return caches[getattr(settings, 'CATALOG_CACHE_ALIAS', 'default')]
+
+
+def get_version(key):
+    cache = catalog_cache()
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so an evicted counter never reuses an old version.
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(key):
+    cache = catalog_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+def invalidate_books(book_ids=()):
+    """Drop cached list pages, plus detail responses of the given books, once the transaction commits."""
+    book_ids = list(book_ids)
+
+    def bump():
+        bump_version(LIST_VERSION_KEY)
+        # Copies are listed with their book's title, so any book change affects that collection too.
+        bump_version(COPY_LIST_VERSION_KEY)
+        for book_id in book_ids:
+            bump_version(BOOK_VERSION_KEY.format(book_id))
+
+    transaction.on_commit(bump)
+
+
+def process_local_cache_warning():
+    """
+    Warning for management commands that call invalidate_books(), or None when
+    the catalog cache is shared. A LocMemCache lives in each process, so the
+    command only bumps its own versions and web workers keep their entries.
+    """
+    if not isinstance(catalog_cache(), LocMemCache):
+        return None
+    return (
+        'The catalog cache is process-local (LocMemCache), so web workers may serve stale catalog '
+        f'responses for up to {getattr(settings, "CATALOG_CACHE_TIMEOUT", 300)}s. Set CATALOG_CACHE_BACKEND '
+        'to a shared backend (e.g. FileBasedCache, Redis or Memcached) for commands to invalidate them.'
+    )
+
+def normalized_query(request):
+    params = sorted(
+        (key, sorted(values))
+        for key, values in request.query_params.lists()
+        if any(values)
+    )
+    # Paginated responses embed absolute next/previous links, so the host is part of the key.
+    return hashlib.sha1(repr((request.get_host(), params)).encode()).hexdigest()
+
+
+def cached_precondition_response(request, headers):
+    """Answer conditional GETs from the validators stored with a cached response."""
+    if 'ETag' not in headers and 'Last-Modified' not in headers:
+        return None
+    last_modified = parse_http_date_safe(headers.get('Last-Modified', ''))
+    response = get_conditional_response(request._request, etag=headers.get('ETag'), last_modified=last_modified)
+    if response is not None:
+        for header, value in headers.items():
+            response[header] = value
+    return response
+
+
+def cached_response(scope):
+    """
+    Cache the data of successful GET responses of a viewset action.
+
+    Detail actions are keyed on the book's version and list actions on the
+    collection version, so invalidate_books() makes stale entries unreachable
+    and the cache backend's TTL / culling evicts them.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            pk = kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+            if pk is not None and str(pk).isdigit():
+                pk = int(pk)
+            version_key = BOOK_VERSION_KEY.format(pk) if pk is not None else LIST_VERSION_KEY
+            key = (
+                f'catalog:{scope}:{pk}:{request.accepted_renderer.format}:'
+                f'{get_version(version_key)}:{normalized_query(request)}'
+            )
+
+            cache = catalog_cache()
+            entry = cache.get(key)
+            if entry is not None:
+                data, headers = entry
+                return cached_precondition_response(request, headers) or Response(data, headers=headers)
+
+            response = method(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                headers = {header: response[header] for header in VALIDATOR_HEADERS if header in response}
+                cache.set(key, (response.data, headers), timeout=getattr(settings, 'CATALOG_CACHE_TIMEOUT', 300))
+            return response
+        return wrapper
+    return decorator
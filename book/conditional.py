@@ -0,0 +1,72 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from .cache import normalized_query
+
+
+def make_etag(*parts):
+    return quote_etag(hashlib.sha1(repr(parts).encode()).hexdigest())
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
+
+
+def precondition_response(request, etag, last_modified):
+    """
+    Evaluate If-None-Match / If-Modified-Since (and If-Match) against the
+    validators. Returns the 304/412 response to send, or None to continue.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified is not None else None
+    response = get_conditional_response(request._request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    Strong ETag and Last-Modified for retrieve, and a strong ETag for list,
+    answering matching conditional GETs with 304 before anything is serialized.
+
+    Detail validators come from the row's `updated_at`. The collection ETag is
+    built from database state only, COUNT(*) and MAX() of
+    `collection_stamp_fields` over the filtered queryset plus the query, so
+    every worker computes the same one. One aggregate query replaces the page
+    query, the pagination count and serialization when nothing changed.
+    Lists send no Last-Modified: MAX(updated_at) does not move when a row is
+    deleted or leaves the filter, so If-Modified-Since alone could get a wrong 304.
+    """
+    collection_stamp_fields = ('updated_at',)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        stamps = {f'max_{n}': Max(field) for n, field in enumerate(self.collection_stamp_fields)}
+        stats = queryset.order_by().aggregate(total=Count('pk'), **stamps)
+        etag = make_etag(
+            self.basename, request.accepted_renderer.format, sorted(stats.items()), normalized_query(request),
+        )
+        response = precondition_response(request, etag, None)
+        if response is not None:
+            return response
+        return set_validators(super().list(request, *args, **kwargs), etag, None)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        return self.conditional_detail_response(
+            request, instance, lambda: Response(self.get_serializer(instance).data)
+        )
+
+    def conditional_detail_response(self, request, instance, build_response):
+        etag = make_etag(self.basename, self.action, request.accepted_renderer.format, instance.pk, instance.updated_at)
+        response = precondition_response(request, etag, instance.updated_at)
+        if response is not None:
+            return response
+        return set_validators(build_response(), etag, instance.updated_at)
@@ -0,0 +1,186 @@
+import asyncio
+import json
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+
+DEFAULT_BROKER = 'book.events.InProcessBroker'
+
+
+class AvailabilityBroker:
+    """
+    Fan-out of availability changes to streaming subscribers.
+
+    Subclasses implement publish() and subscribe(); set AVAILABILITY_BROKER
+    to swap the implementation, e.g. for a cross-process pub/sub in production
+    or a recording stub in tests.
+    """
+
+    def wants(self, book_ids):
+        """Whether anyone may be listening for these books; lets publishers skip the count query."""
+        return True
+
+    def publish(self, events):
+        """Deliver [{'book': id, 'available_count': n}, ...]. Called from synchronous code after commit."""
+        raise NotImplementedError
+
+    def subscribe(self, book_ids):
+        """Return a Subscription whose get() awaits the next event for any of `book_ids`."""
+        raise NotImplementedError
+
+
+class Subscription:
+    def __init__(self, broker, book_ids):
+        self.broker = broker
+        self.book_ids = set(book_ids)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=1000)
+
+    def deliver(self, event):
+        # Runs on the subscriber's event loop; a client that stops reading loses events, not memory.
+        if not self.queue.full():
+            self.queue.put_nowait(event)
+
+    async def get(self, timeout=None):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker(AvailabilityBroker):
+    """
+    Delivers events to subscribers of the current process only. Publishers
+    run in request threads, subscribers on the ASGI event loop, so delivery
+    hops threads with call_soon_threadsafe.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def wants(self, book_ids):
+        return any(book_id in self._subscriptions for book_id in book_ids)
+
+    def publish(self, events):
+        with self._lock:
+            targets = [
+                (subscription, event)
+                for event in events
+                for subscription in self._subscriptions.get(event['book'], ())
+            ]
+        for subscription, event in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # The subscriber's loop is closed; its stream is gone.
+                self.unsubscribe(subscription)
+
+    def subscribe(self, book_ids):
+        subscription = Subscription(self, book_ids)
+        with self._lock:
+            for book_id in subscription.book_ids:
+                self._subscriptions[book_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for book_id in subscription.book_ids:
+                subscribers = self._subscriptions.get(book_id)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscriptions[book_id]
+
+
+class StreamSlots:
+    """
+    Open availability streams per client in this process, capped at
+    AVAILABILITY_STREAM_MAX_PER_CLIENT so one client cannot hold an
+    unbounded number of long-lived connections.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._open = defaultdict(int)
+
+    def acquire(self, client):
+        with self._lock:
+            if self._open[client] >= getattr(settings, 'AVAILABILITY_STREAM_MAX_PER_CLIENT', 3):
+                return False
+            self._open[client] += 1
+            return True
+
+    def release(self, client):
+        with self._lock:
+            self._open[client] -= 1
+            if self._open[client] <= 0:
+                del self._open[client]
+
+
+stream_slots = StreamSlots()
+
+
+class SlotStream:
+    """
+    Streaming body that holds `client`'s slot until the response is closed,
+    which Django does whether or not the body was ever iterated.
+    """
+
+    def __init__(self, events, client):
+        self.events = events
+        self.client = client
+        self.closed = False
+
+    def __aiter__(self):
+        return aiter(self.events)
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            stream_slots.release(self.client)
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        _broker = import_string(getattr(settings, 'AVAILABILITY_BROKER', DEFAULT_BROKER))()
+    return _broker
+
+
+@receiver(setting_changed)
+def reset_broker(setting, **kwargs):
+    global _broker
+    if setting == 'AVAILABILITY_BROKER':
+        _broker = None
+
+
+def publish_availability(book_ids):
+    """Publish the current available_count of `book_ids` once the transaction commits."""
+    book_ids = list(book_ids)
+
+    def publish():
+        from .models import Book
+
+        broker = get_broker()
+        if not broker.wants(book_ids):
+            return
+        counts = Book.objects.filter(pk__in=book_ids).values_list('id', 'available_count')
+        broker.publish([{'book': book_id, 'available_count': count} for book_id, count in counts])
+
+    transaction.on_commit(publish)
+
+
+def sse_message(data, event=None):
+    lines = [f'event: {event}'] if event else []
+    lines.append(f'data: {json.dumps(data)}')
+    return '\n'.join(lines) + '\n\n'
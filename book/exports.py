@@ -0,0 +1,70 @@
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .filters import BookFilter, BookCopyFilter, BorrowRecordFilter
+from .models import Book, BookCopy, BorrowRecord
+
+
+CHUNK_SIZE = 2000
+
+DATASETS = {
+    'books': {
+        'queryset': lambda: Book.objects.all(),
+        'filterset_class': BookFilter,
+        'fields': ['id', 'isbn', 'title', 'author', 'publication_year', 'language', 'topics',
+                   'total_copies', 'available_count'],
+    },
+    'copies': {
+        'queryset': lambda: BookCopy.objects.all(),
+        'filterset_class': BookCopyFilter,
+        'fields': ['id', 'book_id', 'book__title', 'status', 'updated_at'],
+    },
+    'borrows': {
+        'queryset': lambda: BorrowRecord.objects.with_accrued_fee(),
+        'filterset_class': BorrowRecordFilter,
+        'fields': ['id', 'user_id', 'user__email', 'book_copy_id', 'book_copy__book__title', 'borrow_date',
+                   'due_date', 'return_date', 'late_fee', 'accrued_fee', 'fee_paid'],
+    },
+}
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+class Echo:
+    """Pseudo-buffer for csv.writer: hands each formatted line straight back."""
+
+    def write(self, value):
+        return value
+
+
+def filtered_queryset(dataset, params, request=None):
+    """
+    Apply the dataset's FilterSet to `params`. Returns (queryset, errors);
+    errors is None when the parameters are valid.
+    """
+    config = DATASETS[dataset]
+    filterset = config['filterset_class'](params, queryset=config['queryset'](), request=request)
+    if not filterset.is_valid():
+        return None, filterset.errors
+    return filterset.qs.order_by('id'), None
+
+
+def export_lines(dataset, queryset, output):
+    """Yield the export line by line; rows are fetched in chunks, never all at once."""
+    fields = DATASETS[dataset]['fields']
+    rows = queryset.values_list(*fields).iterator(chunk_size=CHUNK_SIZE)
+
+    if output == 'csv':
+        writer = csv.writer(Echo())
+        yield writer.writerow(fields)
+        for row in rows:
+            yield writer.writerow(row)
+        return
+
+    encoder = DjangoJSONEncoder()
+    for row in rows:
+        yield encoder.encode(dict(zip(fields, row))) + '\n'
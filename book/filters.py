@@ -1,11 +1,22 @@
 from django_filters import rest_framework as filters
-from .models import Book, BookCopy, BorrowRecord
+from rest_framework import filters as drf_filters
+from .models import Book, BookCopy, BorrowRecord, Hold
+from .search import full_text_search
+from .text import fold
+
+
+class FoldedCharFilter(filters.CharFilter):
+    """Substring match against a pre-folded *_normalized column; the value is folded the same way."""
+
+    def filter(self, qs, value):
+        return super().filter(qs, fold(value) if value else value)
 
 
 class BookFilter(filters.FilterSet):
-    title = filters.CharFilter(field_name='title', lookup_expr='icontains')
-    author = filters.CharFilter(field_name='author', lookup_expr='icontains')
-    topics = filters.CharFilter(field_name='topics', lookup_expr='icontains')
+    title = FoldedCharFilter(field_name='title_normalized', lookup_expr='contains')
+    author = FoldedCharFilter(field_name='author_normalized', lookup_expr='contains')
+    topics = FoldedCharFilter(field_name='topics_normalized', lookup_expr='contains')
+    topic = FoldedCharFilter(field_name='topic_tags__normalized', lookup_expr='exact', label='Exact topic')
     publication_year_min = filters.NumberFilter(field_name='publication_year', lookup_expr='gte')
     publication_year_max = filters.NumberFilter(field_name='publication_year', lookup_expr='lte')
     language = filters.ChoiceFilter(field_name='language',choices=Book._meta.get_field('language').choices)
@@ -17,7 +28,7 @@ class BookFilter(filters.FilterSet):
 
     def filter_available(self, queryset, name, value):
         if value:
-            return queryset.filter(copies__status=BookCopy.Status.AVAILABLE).distinct()
+            return queryset.filter(available_count__gt=0)
         return queryset
 
 
@@ -32,7 +43,9 @@ class BookCopyFilter(filters.FilterSet):
 
 class BorrowRecordFilter(filters.FilterSet):
     user_id = filters.NumberFilter(field_name='user__id')
-    book_title = filters.CharFilter(field_name='book_copy__book__title', lookup_expr='icontains')
+    book_title = FoldedCharFilter(field_name='book_copy__book__title_normalized', lookup_expr='contains')
+    borrowed_after = filters.IsoDateTimeFilter(field_name='borrow_date', lookup_expr='gte')
+    borrowed_before = filters.IsoDateTimeFilter(field_name='borrow_date', lookup_expr='lt')
     overdue = filters.BooleanFilter(method='filter_overdue')
 
     class Meta:
@@ -44,3 +57,39 @@ class BorrowRecordFilter(filters.FilterSet):
         if value:
             return queryset.filter(return_date__isnull=True, due_date__lt=timezone.now())
         return queryset
+
+
+class HoldFilter(filters.FilterSet):
+    status = filters.ChoiceFilter(field_name='status', choices=Hold.Status.choices)
+    book_id = filters.NumberFilter(field_name='book__id')
+    user_id = filters.NumberFilter(field_name='user__id')
+
+    class Meta:
+        model = Hold
+        fields = ['status', 'book_id', 'user_id']
+
+
+class BookSearchFilter(drf_filters.SearchFilter):
+    """
+    `?search=` backed by the full-text index, ordered by relevance. Terms
+    are folded like the *_normalized columns the index is built from.
+
+    Must run after OrderingFilter: the rank is prepended to whatever ordering
+    is already applied unless the client asked for an explicit `?ordering=`.
+    """
+
+    def get_search_terms(self, request):
+        return [fold(term) for term in super().get_search_terms(request)]
+
+    def filter_queryset(self, request, queryset, view):
+        terms = fold(request.query_params.get(self.search_param, ''))
+        if not terms:
+            return queryset
+
+        results = full_text_search(queryset, terms)
+        if results is None:
+            return super().filter_queryset(request, queryset, view)
+
+        if drf_filters.OrderingFilter.ordering_param in request.query_params:
+            return results
+        return results.order_by('-search_rank', *queryset.query.order_by)
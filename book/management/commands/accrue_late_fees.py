@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from book.models import BorrowRecord, LateFeeEntry, late_fee_expression
+
+
+class Command(BaseCommand):
+    help = (
+        'Accrue late fees for every overdue open loan with set-based UPDATEs in bounded chunks '
+        'and append the changes to the late fee ledger. Meant to run periodically (e.g. hourly cron).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        fee = late_fee_expression(now)
+        overdue = BorrowRecord.objects.filter(return_date__isnull=True, due_date__lt=now)
+
+        last_id = 0
+        scanned = updated = 0
+        while True:
+            with transaction.atomic():
+                chunk = list(
+                    overdue.select_for_update()
+                    .filter(id__gt=last_id)
+                    .order_by('id')
+                    .values_list('id', flat=True)[:options['chunk_size']]
+                )
+                if not chunk:
+                    break
+                last_id = chunk[-1]
+                scanned += len(chunk)
+
+                changes = list(
+                    BorrowRecord.objects.filter(id__in=chunk)
+                    .with_accrued_fee(now)
+                    .exclude(late_fee=F('accrued_fee'))
+                    .values_list('id', 'late_fee', 'accrued_fee')
+                )
+                if changes:
+                    BorrowRecord.objects.filter(id__in=[record_id for record_id, _, _ in changes]).update(late_fee=fee)
+                    LateFeeEntry.objects.bulk_create(LateFeeEntry.for_changes(changes, LateFeeEntry.Reason.ACCRUAL))
+                    updated += len(changes)
+
+        self.stdout.write(self.style.SUCCESS(f'Scanned {scanned} overdue loan(s), accrued fees on {updated}.'))
@@ -0,0 +1,88 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from book.models import Book
+from book.search import full_text_search
+
+
+WORDS = [
+    'history', 'python', 'garden', 'ocean', 'empire', 'algebra', 'music', 'winter',
+    'physics', 'novel', 'kitab', 'dunya', 'tarix', 'mountain', 'river', 'poetry',
+    'science', 'war', 'peace', 'data', 'design', 'city', 'journey', 'silence',
+]
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Compare icontains and full-text search latency for growing catalog sizes. Nothing is persisted.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+        parser.add_argument('--queries', type=int, default=50)
+        parser.add_argument('--vocabulary', type=int, default=5000,
+                            help='Number of distinct words used to generate titles, authors and topics.')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        vocabulary = WORDS + [self._word(rng) for _ in range(max(options['vocabulary'] - len(WORDS), 0))]
+        terms = [rng.choice(vocabulary) for _ in range(options['queries'])]
+
+        self.stdout.write(f'{"books":>10} {"icontains p50":>15} {"fulltext p50":>15} {"speedup":>9}')
+        try:
+            with transaction.atomic():
+                created = 0
+                for size in sorted(options['sizes']):
+                    self._populate(rng, vocabulary, created, size)
+                    created = size
+                    baseline = self._measure(terms, self._icontains)
+                    ranked = self._measure(terms, self._full_text)
+                    self.stdout.write(
+                        f'{size:>10} {baseline * 1000:>13.2f}ms {ranked * 1000:>13.2f}ms {baseline / ranked:>8.1f}x'
+                    )
+                raise Rollback
+        except Rollback:
+            pass
+
+    def _word(self, rng):
+        return ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(4, 9)))
+
+    def _populate(self, rng, vocabulary, start, stop):
+        batch = []
+        for i in range(start, stop):
+            book = Book(
+                title=' '.join(rng.sample(vocabulary, 3)).title(),
+                author=f'{rng.choice(vocabulary).title()} {rng.choice(vocabulary).title()}',
+                isbn=f'bench{i:08d}',
+                publication_year=rng.randint(1900, 2024),
+                topics=', '.join(rng.sample(vocabulary, 2)),
+            )
+            book.refresh_normalized()
+            batch.append(book)
+            if len(batch) == 5000:
+                Book.objects.bulk_create(batch)
+                batch = []
+        Book.objects.bulk_create(batch)
+
+    def _measure(self, terms, search):
+        timings = []
+        for term in terms:
+            started = time.perf_counter()
+            list(search(term)[:20].values_list('id', flat=True))
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings)
+
+    def _icontains(self, term):
+        query = Q(title__icontains=term) | Q(author__icontains=term) | Q(topics__icontains=term)
+        return Book.objects.filter(query).order_by('-publication_year')
+
+    def _full_text(self, term):
+        return full_text_search(Book.objects.all(), term).order_by('-search_rank', '-publication_year')
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from book.models import Hold
+
+
+class Command(BaseCommand):
+    help = (
+        'Expire ready holds whose pickup period has run out and pass their reserved copies on '
+        'to the next member in line. Meant to run periodically (e.g. hourly cron).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=200)
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        expired = 0
+        while True:
+            with transaction.atomic():
+                # Uses hold_status_expiry_idx; skip_locked leaves holds being borrowed right now alone,
+                # and of=('self',) keeps the lock off the outer-joined (nullable) book_copy.
+                chunk = list(
+                    Hold.objects.select_for_update(skip_locked=True, of=('self',))
+                    .select_related('book_copy')
+                    .filter(status=Hold.Status.READY, expires_at__lt=now)
+                    .order_by('expires_at', 'id')[:options['chunk_size']]
+                )
+                for hold in chunk:
+                    hold.close(Hold.Status.EXPIRED)
+            expired += len(chunk)
+            if len(chunk) < options['chunk_size']:
+                break
+
+        self.stdout.write(self.style.SUCCESS(f'Expired {expired} hold(s).'))
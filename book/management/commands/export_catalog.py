@@ -0,0 +1,37 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.http import QueryDict
+
+from book.exports import DATASETS, CONTENT_TYPES, filtered_queryset, export_lines
+
+
+class Command(BaseCommand):
+    help = 'Stream books, copies or borrow records as CSV or NDJSON with constant memory.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(DATASETS))
+        parser.add_argument('--output', choices=sorted(CONTENT_TYPES), default='csv')
+        parser.add_argument('--file', help='Write to this file instead of stdout.')
+        parser.add_argument('--filter', action='append', default=[], metavar='NAME=VALUE',
+                            help='Filter parameter as accepted by the API, e.g. --filter overdue=true.')
+
+    def handle(self, *args, **options):
+        params = QueryDict(mutable=True)
+        for item in options['filter']:
+            name, sep, value = item.partition('=')
+            if not sep:
+                raise CommandError(f'Filters must look like NAME=VALUE, got {item!r}')
+            params.appendlist(name, value)
+
+        queryset, errors = filtered_queryset(options['dataset'], params)
+        if errors:
+            raise CommandError(f'Invalid filters: {dict(errors)}')
+
+        stream = open(options['file'], 'w', newline='', encoding='utf-8') if options['file'] else sys.stdout
+        try:
+            for line in export_lines(options['dataset'], queryset, options['output']):
+                stream.write(line)
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
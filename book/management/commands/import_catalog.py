@@ -0,0 +1,153 @@
+import csv
+import json
+import sys
+import time
+from datetime import datetime
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from book.cache import invalidate_books, process_local_cache_warning
+from book.models import Book, BookCopy, Topic
+
+
+LANGUAGES = dict(Book._meta.get_field('language').choices)
+
+
+class Command(BaseCommand):
+    help = (
+        'Stream books from a CSV or JSONL file (columns: title, author, isbn, publication_year, '
+        'topics, language, copies) and load them with batched ISBN checks and bulk inserts.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, or '-' for stdin.")
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Defaults to the file extension.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--default-copies', type=int, default=1,
+                            help='Copies to create when a row has no copies column.')
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or ('jsonl' if options['path'].endswith(('.jsonl', '.ndjson')) else 'csv')
+        self.default_copies = options['default_copies']
+        if self.default_copies < 0:
+            raise CommandError('--default-copies cannot be negative')
+        self.current_year = datetime.now().year
+        self.stats = {'read': 0, 'created': 0, 'copies': 0, 'duplicates': 0, 'invalid': 0}
+
+        started = time.perf_counter()
+        try:
+            stream = sys.stdin if options['path'] == '-' else open(options['path'], newline='', encoding='utf-8')
+        except OSError as exc:
+            raise CommandError(f'Cannot open {options["path"]}: {exc}')
+        try:
+            rows = self.read_rows(stream, fmt)
+            while batch := list(islice(rows, options['batch_size'])):
+                self.import_batch(batch)
+                if options['verbosity'] > 1:
+                    self.report(started)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        invalidate_books()
+        self.report(started, style=self.style.SUCCESS)
+        if self.stats['created'] and (warning := process_local_cache_warning()):
+            self.stderr.write(self.style.WARNING(warning))
+
+    def read_rows(self, stream, fmt):
+        if fmt == 'csv':
+            for line_no, row in enumerate(csv.DictReader(stream), start=2):
+                yield line_no, row
+            return
+        for line_no, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_no, json.loads(line)
+            except json.JSONDecodeError as exc:
+                yield line_no, exc
+
+    def clean(self, line_no, row):
+        """Return (Book, copies) for a valid row or None after reporting the problem."""
+        if isinstance(row, Exception):
+            return self.invalid(line_no, f'malformed JSON ({row})')
+        if not isinstance(row, dict):
+            return self.invalid(line_no, 'expected a JSON object')
+
+        isbn = str(row.get('isbn') or '').strip().replace('-', '')
+        title = str(row.get('title') or '').strip()
+        author = str(row.get('author') or '').strip()
+        language = str(row.get('language') or 'EN').strip().upper()
+        if not isbn or len(isbn) > 13:
+            return self.invalid(line_no, f'invalid isbn {isbn!r}')
+        if not title or not author:
+            return self.invalid(line_no, 'title and author are required')
+        if language not in LANGUAGES:
+            return self.invalid(line_no, f'unknown language {language!r}')
+        copies = row.get('copies')
+        if copies is None or str(copies).strip() == '':
+            # Only a missing or blank column falls back; an explicit 0 imports no copies.
+            copies = self.default_copies
+        try:
+            year = int(row.get('publication_year'))
+            copies = int(copies)
+        except (TypeError, ValueError):
+            return self.invalid(line_no, 'publication_year and copies must be integers')
+        if year < 1500 or year > self.current_year:
+            return self.invalid(line_no, 'publication_year must be between 1500 and current year')
+        if copies < 0:
+            return self.invalid(line_no, 'copies cannot be negative')
+
+        book = Book(
+            title=title[:255], author=author[:255], isbn=isbn, publication_year=year,
+            topics=str(row.get('topics') or '')[:255], language=language,
+            total_copies=copies, available_count=copies,
+        )
+        book.refresh_normalized()
+        return book, copies
+
+    def invalid(self, line_no, reason):
+        self.stats['invalid'] += 1
+        self.stderr.write(f'line {line_no}: {reason}')
+        return None
+
+    def import_batch(self, batch):
+        self.stats['read'] += len(batch)
+        candidates = {}
+        for line_no, row in batch:
+            cleaned = self.clean(line_no, row)
+            if cleaned is None:
+                continue
+            if cleaned[0].isbn in candidates:
+                self.stats['duplicates'] += 1
+                continue
+            candidates[cleaned[0].isbn] = cleaned
+
+        with transaction.atomic():
+            existing = set(Book.objects.filter(isbn__in=candidates).values_list('isbn', flat=True))
+            self.stats['duplicates'] += len(existing)
+            new = [candidates[isbn] for isbn in candidates if isbn not in existing]
+
+            books = Book.objects.bulk_create([book for book, _ in new])
+            Topic.link_books(books)
+            copies = (
+                BookCopy(book=book)
+                for book, (_, count) in zip(books, new)
+                for _ in range(count)
+            )
+            while chunk := list(islice(copies, 5000)):
+                BookCopy.objects.bulk_create(chunk)
+                self.stats['copies'] += len(chunk)
+            self.stats['created'] += len(books)
+
+    def report(self, started, style=None):
+        elapsed = time.perf_counter() - started
+        rate = self.stats['read'] / elapsed if elapsed else 0
+        message = (
+            f"{self.stats['read']} rows read, {self.stats['created']} books and {self.stats['copies']} copies created, "
+            f"{self.stats['duplicates']} duplicate ISBNs skipped, {self.stats['invalid']} invalid rows "
+            f"in {elapsed:.1f}s ({rate:.0f} rows/s)"
+        )
+        self.stdout.write(style(message) if style else message)
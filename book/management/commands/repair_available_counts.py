@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from book.cache import invalidate_books, process_local_cache_warning
+from book.models import Book, BookCopy
+
+
+class Command(BaseCommand):
+    help = 'Recompute Book.available_count from BookCopy rows and repair any drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Only report drifted books.')
+
+    def handle(self, *args, **options):
+        self.available = available = (
+            BookCopy.objects.filter(book=OuterRef('pk'), status=BookCopy.Status.AVAILABLE)
+            .order_by()
+            .values('book')
+            .annotate(total=Count('id'))
+            .values('total')
+        )
+        drifted = (
+            Book.objects.annotate(actual=Coalesce(Subquery(available), 0))
+            .exclude(available_count=F('actual'))
+            .values_list('id', 'available_count', 'actual')
+        )
+
+        batch_size = options['batch_size']
+        batch = []
+        repaired = 0
+        for book_id, stored, actual in drifted.iterator(chunk_size=batch_size):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'Book {book_id}: stored {stored}, actual {actual}')
+            batch.append(book_id)
+            if len(batch) >= batch_size:
+                repaired += self._flush(batch, options['dry_run'])
+                batch = []
+        repaired += self._flush(batch, options['dry_run'])
+
+        verb = 'Found' if options['dry_run'] else 'Repaired'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {repaired} drifted book(s).'))
+        if repaired and not options['dry_run'] and (warning := process_local_cache_warning()):
+            self.stderr.write(self.style.WARNING(warning))
+
+    def _flush(self, batch, dry_run):
+        # Recount inside the UPDATE itself so copies changed since the scan are respected.
+        if batch and not dry_run:
+            Book.objects.filter(pk__in=batch).update(
+                available_count=Coalesce(Subquery(self.available), 0), updated_at=timezone.now()
+            )
+            invalidate_books(batch)
+        return len(batch)
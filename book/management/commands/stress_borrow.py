@@ -0,0 +1,97 @@
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.models import Count
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from book.models import Book, BookCopy, BorrowRecord
+from book.views import BorrowRecordAPIView
+from user.models import User
+
+
+class UnthrottledBorrowView(BorrowRecordAPIView):
+    throttle_classes = []
+
+
+class Command(BaseCommand):
+    help = (
+        'Hammer the borrow and return endpoints from many threads and verify that no copy is '
+        'lent twice, no loan is returned twice and available_count stays exact. '
+        'Creates its own book, copies and members and deletes them afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--copies', type=int, default=5)
+        parser.add_argument('--members', type=int, default=200)
+        parser.add_argument('--workers', type=int, default=32)
+        parser.add_argument('--by-book', action='store_true',
+                            help='Borrow with {"book": id} and let the server allocate copies.')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite' and options['workers'] > 1:
+            self.stdout.write(self.style.WARNING('SQLite serialises writers; expect "database is locked" errors.'))
+
+        tag = uuid.uuid4().hex[:8]
+        book = Book.objects.create(title=f'stress-{tag}', author='stress', isbn=tag, publication_year=2000)
+        copies = [BookCopy.objects.create(book=book) for _ in range(options['copies'])]
+        members = User.objects.bulk_create(
+            User(username=f'stress-{tag}-{i}', email=f'stress-{tag}-{i}@example.com', role=User.Role.MEMBER)
+            for i in range(options['members'])
+        )
+        try:
+            self.run_stress(book, copies, members, options['workers'], options['by_book'])
+        finally:
+            BorrowRecord.objects.filter(book_copy__book=book).delete()
+            User.objects.filter(pk__in=[member.pk for member in members]).delete()
+            book.delete()
+
+    def run_stress(self, book, copies, members, workers, by_book):
+        factory = APIRequestFactory()
+        view = UnthrottledBorrowView.as_view()
+
+        def call(user, path, data=None, **kwargs):
+            try:
+                request = factory.post(path, data or {}, format='json')
+                force_authenticate(request, user=user)
+                return view(request, **kwargs).status_code
+            finally:
+                connections.close_all()
+
+        # Every member races for a copy, several members per copy.
+        attempts = [
+            (member, {'book': book.pk} if by_book else {'book_copy': copies[i % len(copies)].pk})
+            for i, member in enumerate(members)
+        ]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            borrow_codes = Counter(pool.map(lambda a: call(a[0], '/api/borrow/', a[1]), attempts))
+        self.stdout.write(f'borrow responses: {dict(borrow_codes)}')
+
+        open_loans = BorrowRecord.objects.filter(book_copy__book=book, return_date__isnull=True)
+        lent_twice = open_loans.values('book_copy').annotate(n=Count('id')).filter(n__gt=1)
+        self.ensure(not lent_twice.exists(), 'a copy was lent to more than one member')
+        self.ensure(borrow_codes[201] == open_loans.count() == len(copies), 'winners do not match open loans')
+        self.check_counter(book)
+
+        # Every loan is returned by several admins at once; exactly one may succeed.
+        admin = User(role=User.Role.ADMIN, is_active=True)
+        returns = [pk for pk in open_loans.values_list('pk', flat=True) for _ in range(max(workers // len(copies), 2))]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return_codes = Counter(pool.map(lambda pk: call(admin, f'/api/return/{pk}/', id=pk), returns))
+        self.stdout.write(f'return responses: {dict(return_codes)}')
+
+        self.ensure(return_codes[200] == len(copies), 'a loan was returned more than once')
+        self.ensure(not open_loans.exists(), 'a loan was left open')
+        self.check_counter(book)
+        self.stdout.write(self.style.SUCCESS('No double lending, no double returns, available_count exact.'))
+
+    def check_counter(self, book):
+        book.refresh_from_db(fields=['available_count'])
+        actual = book.copies.filter(status=BookCopy.Status.AVAILABLE).count()
+        self.ensure(book.available_count == actual, f'available_count {book.available_count} != {actual}')
+
+    def ensure(self, condition, message):
+        if not condition:
+            raise CommandError(message)
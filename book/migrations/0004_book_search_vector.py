@@ -0,0 +1,66 @@
+# Generated by Django 5.2.4 on 2026-10-17 05:49
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+POSTGRES_FORWARD = [
+    """
+    CREATE FUNCTION book_book_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('simple', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(NEW.author, '')), 'B') ||
+            setweight(to_tsvector('simple', coalesce(NEW.topics, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql;
+    """,
+    """
+    CREATE TRIGGER book_book_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, author, topics, search_vector ON book_book
+    FOR EACH ROW EXECUTE FUNCTION book_book_search_vector_update();
+    """,
+    "UPDATE book_book SET search_vector = NULL;",
+    "CREATE INDEX book_book_search_vector_gin ON book_book USING gin (search_vector);",
+]
+
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS book_book_search_vector_gin;",
+    "DROP TRIGGER IF EXISTS book_book_search_vector_trigger ON book_book;",
+    "DROP FUNCTION IF EXISTS book_book_search_vector_update();",
+]
+
+
+def _run(schema_editor, statements):
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    # SQLite gets its FTS5 index from book.search.ensure_sqlite_fts after migrate.
+    if vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_FORWARD)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_REVERSE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book', '0003_borrowrecord_check_due_date_after_borrow_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
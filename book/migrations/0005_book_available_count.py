@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2026-10-17 06:12
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_available_count(apps, schema_editor):
+    Book = apps.get_model('book', 'Book')
+    BookCopy = apps.get_model('book', 'BookCopy')
+    available = (
+        BookCopy.objects.filter(book=OuterRef('pk'), status='available')
+        .order_by()
+        .values('book')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    Book.objects.update(available_count=Coalesce(Subquery(available), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book', '0004_book_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='available_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_available_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-17 05:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book', '0007_borrowrecord_user_date_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LateFeeEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reason', models.CharField(choices=[('accrual', 'Accrual'), ('return', 'Return')], max_length=20)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('borrow_record', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fee_entries', to='book.borrowrecord')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['borrow_record', 'created_at'], name='latefee_record_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,126 @@
+# Generated by Django 5.2.4 on 2026-10-17 06:05
+
+from django.db import migrations, models
+
+from book.text import fold
+
+
+NORMALIZED_FIELDS = {'title': 'title_normalized', 'author': 'author_normalized', 'topics': 'topics_normalized'}
+
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm;",
+    "CREATE INDEX book_book_title_norm_trgm ON book_book USING gin (title_normalized gin_trgm_ops);",
+    "CREATE INDEX book_book_author_norm_trgm ON book_book USING gin (author_normalized gin_trgm_ops);",
+    "CREATE INDEX book_book_topics_norm_trgm ON book_book USING gin (topics_normalized gin_trgm_ops);",
+    """
+    CREATE OR REPLACE FUNCTION book_book_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('simple', coalesce(NEW.title_normalized, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(NEW.author_normalized, '')), 'B') ||
+            setweight(to_tsvector('simple', coalesce(NEW.topics_normalized, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql;
+    """,
+    "DROP TRIGGER IF EXISTS book_book_search_vector_trigger ON book_book;",
+    """
+    CREATE TRIGGER book_book_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title_normalized, author_normalized, topics_normalized, search_vector ON book_book
+    FOR EACH ROW EXECUTE FUNCTION book_book_search_vector_update();
+    """,
+    "UPDATE book_book SET search_vector = NULL;",
+]
+
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS book_book_title_norm_trgm;",
+    "DROP INDEX IF EXISTS book_book_author_norm_trgm;",
+    "DROP INDEX IF EXISTS book_book_topics_norm_trgm;",
+    """
+    CREATE OR REPLACE FUNCTION book_book_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('simple', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(NEW.author, '')), 'B') ||
+            setweight(to_tsvector('simple', coalesce(NEW.topics, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql;
+    """,
+    "DROP TRIGGER IF EXISTS book_book_search_vector_trigger ON book_book;",
+    """
+    CREATE TRIGGER book_book_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, author, topics, search_vector ON book_book
+    FOR EACH ROW EXECUTE FUNCTION book_book_search_vector_update();
+    """,
+    "UPDATE book_book SET search_vector = NULL;",
+]
+
+# The FTS5 table changes columns; book.search.ensure_sqlite_fts recreates it after migrate.
+SQLITE_DROP_FTS = [
+    "DROP TRIGGER IF EXISTS book_book_fts_insert;",
+    "DROP TRIGGER IF EXISTS book_book_fts_delete;",
+    "DROP TRIGGER IF EXISTS book_book_fts_update;",
+    "DROP TABLE IF EXISTS book_book_fts;",
+]
+
+
+def _run(schema_editor, statements):
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def backfill_normalized(apps, schema_editor):
+    Book = apps.get_model('book', 'Book')
+    batch = []
+    for book in Book.objects.only('id', *NORMALIZED_FIELDS).iterator(chunk_size=2000):
+        for source, target in NORMALIZED_FIELDS.items():
+            setattr(book, target, fold(getattr(book, source))[:255])
+        batch.append(book)
+        if len(batch) == 2000:
+            Book.objects.bulk_update(batch, list(NORMALIZED_FIELDS.values()))
+            batch = []
+    Book.objects.bulk_update(batch, list(NORMALIZED_FIELDS.values()))
+
+
+def switch_search_to_normalized(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_FORWARD)
+    elif vendor == 'sqlite':
+        _run(schema_editor, SQLITE_DROP_FTS)
+
+
+def switch_search_to_raw(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_REVERSE)
+    elif vendor == 'sqlite':
+        _run(schema_editor, SQLITE_DROP_FTS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book', '0009_book_updated_at_bookcopy_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='author_normalized',
+            field=models.CharField(default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='title_normalized',
+            field=models.CharField(default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='topics_normalized',
+            field=models.CharField(default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(backfill_normalized, migrations.RunPython.noop),
+        migrations.RunPython(switch_search_to_normalized, switch_search_to_raw),
+    ]
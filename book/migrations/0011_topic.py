@@ -0,0 +1,71 @@
+# Generated by Django 5.2.4 on 2026-10-17 06:07
+
+from django.db import migrations, models
+
+from book.text import fold
+
+
+def split_topics(topics):
+    names = {}
+    for name in (topics or '').split(','):
+        name = name.strip()[:100]
+        if name:
+            names.setdefault(fold(name)[:100], name)
+    return names
+
+
+def link_existing_topics(apps, schema_editor):
+    Book = apps.get_model('book', 'Book')
+    Topic = apps.get_model('book', 'Topic')
+    links = Book.topic_tags.through
+
+    rows = Book.objects.exclude(topics='').values_list('id', 'topics').order_by('id').iterator(chunk_size=2000)
+    topic_ids = {}
+    batch = []
+    for book_id, topics in rows:
+        batch.append((book_id, split_topics(topics)))
+        if len(batch) == 2000:
+            _link_batch(Topic, links, batch, topic_ids)
+            batch = []
+    _link_batch(Topic, links, batch, topic_ids)
+
+
+def _link_batch(Topic, links, batch, topic_ids):
+    missing = {}
+    for _, names in batch:
+        for key, name in names.items():
+            if key not in topic_ids:
+                missing.setdefault(key, name)
+    if missing:
+        Topic.objects.bulk_create(
+            [Topic(name=name, normalized=key) for key, name in missing.items()], ignore_conflicts=True
+        )
+        topic_ids.update(Topic.objects.filter(normalized__in=missing).values_list('normalized', 'id'))
+    links.objects.bulk_create(
+        [links(book_id=book_id, topic_id=topic_ids[key]) for book_id, names in batch for key in names],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book', '0010_book_normalized_search_columns'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Topic',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('normalized', models.CharField(editable=False, max_length=100, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='topic_tags',
+            field=models.ManyToManyField(blank=True, editable=False, related_name='books', to='book.topic'),
+        ),
+        migrations.RunPython(link_existing_topics, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,95 @@
 import decimal
-from django.db import models
+from collections import Counter
+from django.db import models, transaction
+from django.contrib.postgres.search import SearchVectorField
 from datetime import timedelta
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
-from user.models import User
+from user.models import OutboxEmail, User
+from .cache import invalidate_books
+from .events import publish_availability
+from .text import fold
+
+
+class Topic(models.Model):
+    name = models.CharField(max_length=100)
+    # fold()ed name; two spellings of the same topic share one row.
+    normalized = models.CharField(max_length=100, unique=True, editable=False)
+
+    def __str__(self):
+        return self.name
+
+    def save(self, *args, **kwargs):
+        self.normalized = fold(self.name)[:100]
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def parse(topics):
+        """Split a comma separated topics string into {normalized: name}."""
+        names = {}
+        for name in (topics or '').split(','):
+            name = name.strip()[:100]
+            if name:
+                names.setdefault(fold(name)[:100], name)
+        return names
+
+    @classmethod
+    def link_books(cls, books):
+        """Replace the Topic links of saved `books` from their `topics` strings with a few bulk queries."""
+        wanted = {book.pk: cls.parse(book.topics) for book in books}
+        names = {}
+        for parsed in wanted.values():
+            for normalized, name in parsed.items():
+                names.setdefault(normalized, name)
+
+        cls.objects.bulk_create(
+            [cls(name=name, normalized=normalized) for normalized, name in names.items()], ignore_conflicts=True
+        )
+        topic_ids = dict(cls.objects.filter(normalized__in=names).values_list('normalized', 'id'))
+        links = Book.topic_tags.through
+        links.objects.filter(book_id__in=wanted).delete()
+        links.objects.bulk_create([
+            links(book_id=book_id, topic_id=topic_ids[normalized])
+            for book_id, parsed in wanted.items()
+            for normalized in parsed
+        ])
+
+
+class BookQuerySet(models.QuerySet):
+    COPY_COUNT_FIELDS = {
+        'available': 'copies_available',
+        'borrowed': 'copies_borrowed',
+        'maintenance': 'copies_maintenance',
+        'reserved': 'copies_reserved',
+    }
+
+    def with_copy_counts(self):
+        """
+        Annotate copies_available / _borrowed / _maintenance / _reserved live
+        from BookCopy. Correlated subqueries keep the outer query ungrouped,
+        so this composes with full-text ranking and keyset pagination.
+        """
+        return self.annotate(**{
+            field: Coalesce(
+                models.Subquery(
+                    BookCopy.objects.filter(book=models.OuterRef('pk'), status=copy_status)
+                    .order_by()
+                    .values('book')
+                    .annotate(count=models.Count('pk'))
+                    .values('count')
+                ),
+                0,
+            )
+            for copy_status, field in self.COPY_COUNT_FIELDS.items()
+        })
+
+    def copy_counts(self):
+        """Per-status copy counts of every book in the queryset as dicts, in one grouped query."""
+        return self.order_by().values('id').annotate(**{
+            field: models.Count('copies', filter=models.Q(copies__status=copy_status))
+            for copy_status, field in self.COPY_COUNT_FIELDS.items()
+        })
 
 
 class Book(models.Model):
@@ -12,6 +98,8 @@ class Book(models.Model):
     isbn = models.CharField(max_length=13, unique=True)
     publication_year = models.PositiveIntegerField()
     topics = models.CharField(max_length=255, blank=True)
+    # Indexed form of `topics`, rebuilt from the string by save() and Topic.link_books().
+    topic_tags = models.ManyToManyField(Topic, related_name='books', blank=True, editable=False)
     total_copies = models.PositiveIntegerField(default=1)
     language = models.CharField(max_length=255,choices=
         [
@@ -22,13 +110,115 @@ class Book(models.Model):
         ],
         default='EN'
     )
+    # Number of copies with status 'available', kept in sync by BookCopy.save() and
+    # the post_delete signal. `manage.py repair_available_counts` fixes any drift.
+    available_count = models.PositiveIntegerField(default=0, editable=False)
+    # Maintained by a database trigger (see migration 0004), never written from Python.
+    search_vector = SearchVectorField(null=True, editable=False)
+    # fold()ed copies of title/author/topics that filters and search query, so
+    # Turkish and Azerbaijani spellings match regardless of case or diacritics.
+    title_normalized = models.CharField(max_length=255, editable=False, default='')
+    author_normalized = models.CharField(max_length=255, editable=False, default='')
+    topics_normalized = models.CharField(max_length=255, editable=False, default='')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = BookQuerySet.as_manager()
+
+    NORMALIZED_FIELDS = {
+        'title': 'title_normalized',
+        'author': 'author_normalized',
+        'topics': 'topics_normalized',
+    }
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-publication_year', '-id'], name='book_pubyear_id_idx'),
+            models.Index(fields=['title', 'id'], name='book_title_id_idx'),
+        ]
 
     def __str__(self):
         return f'{self.title} ({self.author})'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_topics = instance.__dict__.get('topics')
+        return instance
+
+    def save(self, *args, **kwargs):
+        self.refresh_normalized()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {
+                *update_fields,
+                *(target for source, target in self.NORMALIZED_FIELDS.items() if source in update_fields),
+            }
+        if self._state.adding:
+            topics_changed = bool(self.topics)
+        else:
+            topics_changed = getattr(self, '_loaded_topics', None) != self.topics
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if topics_changed and (update_fields is None or 'topics' in update_fields):
+                Topic.link_books([self])
+        self._loaded_topics = self.topics
+
+    def refresh_normalized(self):
+        """Recompute the *_normalized columns; call before bulk_create, which skips save()."""
+        for source, target in self.NORMALIZED_FIELDS.items():
+            setattr(self, target, fold(getattr(self, source))[:255])
+
     def available_copies(self):
-        borrowed_count = BookCopy.objects.filter(book=self, status=BookCopy.Status.BORROWED).count()
-        return self.total_copies - borrowed_count
+        return self.available_count
+
+    def claim_available_copy(self):
+        """
+        Borrow any available copy of this book. Rows locked by concurrent
+        borrowers are skipped, so they never queue behind each other.
+        Must be called inside transaction.atomic().
+        """
+        book_copy = (
+            self.copies.select_for_update(skip_locked=True)
+            .filter(status=BookCopy.Status.AVAILABLE)
+            .order_by('id')
+            .first()
+        )
+        if book_copy is None or not book_copy.transition(BookCopy.Status.AVAILABLE, BookCopy.Status.BORROWED):
+            return None
+        return book_copy
+
+    @staticmethod
+    def adjust_available_count(book_id, delta, total_delta=0):
+        """
+        Apply the counter deltas and mark the book changed. Called for every
+        copy status change, including those that leave available_count alone
+        (e.g. borrowed -> reserved), so updated_at and cached responses move too.
+        """
+        Book.objects.filter(pk=book_id).update(
+            available_count=models.F('available_count') + delta,
+            total_copies=models.F('total_copies') + total_delta,
+            updated_at=timezone.now(),
+        )
+        invalidate_books([book_id])
+        if delta:
+            publish_availability([book_id])
+
+    @staticmethod
+    def adjust_available_counts(deltas):
+        """Apply {book_id: delta} to available_count in a single UPDATE; zero deltas still mark the book changed."""
+        if not deltas:
+            return
+        change = models.Case(
+            *[models.When(pk=book_id, then=models.Value(delta)) for book_id, delta in deltas.items() if delta],
+            default=models.Value(0),
+        )
+        Book.objects.filter(pk__in=deltas).update(
+            available_count=models.F('available_count') + change, updated_at=timezone.now()
+        )
+        invalidate_books(deltas)
+        moved = [book_id for book_id, delta in deltas.items() if delta]
+        if moved:
+            publish_availability(moved)
 
 
 class BookCopy(models.Model):
@@ -36,9 +226,16 @@ class BookCopy(models.Model):
         AVAILABLE = 'available', 'Available'
         BORROWED = 'borrowed', 'Borrowed'
         MAINTENANCE = 'maintenance', 'Maintenance'
+        RESERVED = 'reserved', 'Reserved for a hold'
 
     book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='copies')
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.AVAILABLE)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id'], name='bookcopy_status_id_idx'),
+        ]
 
     def __str__(self):
         return f'{self.book.title} - {self.get_status_display()}'
@@ -46,8 +243,111 @@ class BookCopy(models.Model):
     def is_available(self):
         return self.status == self.Status.AVAILABLE
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            # The prior status comes from the locked row, not from when this instance was loaded,
+            # so a concurrent transition() is either seen here or fails its conditional UPDATE.
+            prior = None
+            if not self._state.adding:
+                prior = BookCopy.objects.select_for_update().filter(pk=self.pk).values_list('book_id', 'status').first()
+            loaded_book_id, loaded_status = prior or (None, None)
+            was_available = loaded_status == self.Status.AVAILABLE
+
+            super().save(*args, **kwargs)
+            if loaded_book_id != self.book_id:
+                if loaded_book_id is not None:
+                    Book.adjust_available_count(loaded_book_id, -1 if was_available else 0)
+                Book.adjust_available_count(self.book_id, 1 if self.is_available() else 0)
+            elif loaded_status != self.status:
+                Book.adjust_available_count(self.book_id, self.is_available() - was_available)
+
+    def transition(self, from_status, to_status):
+        """
+        Atomically move the copy from `from_status` to `to_status` with a single
+        conditional UPDATE. Returns False if another request changed it first.
+        Call inside transaction.atomic() so the counter update commits with it.
+        """
+        now = timezone.now()
+        updated = BookCopy.objects.filter(pk=self.pk, status=from_status).update(status=to_status, updated_at=now)
+        if not updated:
+            return False
+        delta = (to_status == self.Status.AVAILABLE) - (from_status == self.Status.AVAILABLE)
+        Book.adjust_available_count(self.book_id, delta)
+        self.status = to_status
+        self.updated_at = now
+        return True
+
+    @classmethod
+    def bulk_transition(cls, ids, from_status, to_status):
+        """
+        Set-based version of transition(): locks the copies among `ids` that are
+        still in `from_status`, moves them in one UPDATE and returns their ids.
+        Must be called inside transaction.atomic().
+        """
+        rows = list(cls.objects.select_for_update().filter(pk__in=ids, status=from_status).values_list('id', 'book_id'))
+        if not rows:
+            return set()
+        moved = {pk for pk, _ in rows}
+        cls.objects.filter(pk__in=moved).update(status=to_status, updated_at=timezone.now())
+
+        delta = (to_status == cls.Status.AVAILABLE) - (from_status == cls.Status.AVAILABLE)
+        counts = Counter(book_id for _, book_id in rows)
+        Book.adjust_available_counts({book_id: count * delta for book_id, count in counts.items()})
+        return moved
+
+
+class DaysBetween(models.Func):
+    """Whole days from `start` to `end`, truncated like timedelta.days for positive spans."""
+    output_field = models.IntegerField()
+
+    def __init__(self, start, end, **extra):
+        super().__init__(end, start, **extra)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler, connection,
+            template='FLOOR(EXTRACT(EPOCH FROM (%(expressions)s)) / 86400)',
+            arg_joiner=' - ',
+            **extra_context,
+        )
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        end_sql, end_params = compiler.compile(self.source_expressions[0])
+        start_sql, start_params = compiler.compile(self.source_expressions[1])
+        return f'CAST(julianday({end_sql}) - julianday({start_sql}) AS INTEGER)', (*end_params, *start_params)
+
+
+def late_fee_expression(now=None):
+    """
+    Database-side equivalent of BorrowRecord.calculated_late_fee(): whole days
+    between due_date and return_date (or `now` for open loans) times the daily fee.
+    """
+    now = now or timezone.now()
+    end_date = Coalesce('return_date', models.Value(now, output_field=models.DateTimeField()))
+    fee_field = models.DecimalField(max_digits=10, decimal_places=2)
+    return models.Case(
+        models.When(
+            due_date__lt=end_date,
+            then=models.ExpressionWrapper(
+                DaysBetween('due_date', end_date) * models.Value(BorrowRecord.LATE_FEE_PER_DAY),
+                output_field=fee_field,
+            ),
+        ),
+        default=models.Value(decimal.Decimal('0.00')),
+        output_field=fee_field,
+    )
+
+
+class BorrowRecordQuerySet(models.QuerySet):
+    def with_accrued_fee(self, now=None):
+        """Annotate `accrued_fee`, the live late fee computed by the database."""
+        return self.annotate(accrued_fee=late_fee_expression(now))
+
 
 class BorrowRecord(models.Model):
+    LOAN_PERIOD = timedelta(days=14)
+    LATE_FEE_PER_DAY = decimal.Decimal('1.00')
+
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='borrows')
     book_copy = models.ForeignKey(BookCopy, on_delete=models.PROTECT, related_name='borrow_records')
     borrow_date = models.DateTimeField(auto_now_add=True)
@@ -56,6 +356,8 @@ class BorrowRecord(models.Model):
     late_fee = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     fee_paid = models.BooleanField(default=False)
 
+    objects = BorrowRecordQuerySet.as_manager()
+
     def __str__(self):
         return f'{self.user.email} - {self.book_copy.book.title}'
 
@@ -66,7 +368,7 @@ class BorrowRecord(models.Model):
         if not self.borrow_date:
             self.borrow_date = timezone.now()
         if not self.due_date or self.due_date <= self.borrow_date:
-            self.due_date = self.borrow_date + timedelta(days=14)
+            self.due_date = self.borrow_date + self.LOAN_PERIOD
         
         self.late_fee = self.calculated_late_fee()
         super().save(*args, **kwargs)
@@ -77,14 +379,181 @@ class BorrowRecord(models.Model):
 
         if end_date > self.due_date:
             days_late = (end_date - self.due_date).days
-            return decimal.Decimal(days_late) * decimal.Decimal('1.00')
+            return decimal.Decimal(days_late) * self.LATE_FEE_PER_DAY
 
         return decimal.Decimal('0.00')
     
     class Meta:
+        indexes = [
+            models.Index(fields=['-borrow_date', '-id'], name='borrow_date_id_idx'),
+            models.Index(fields=['user', '-borrow_date'], name='borrow_user_date_idx'),
+        ]
         constraints = [
             models.CheckConstraint(
                 condition=models.Q(due_date__gt=models.F('borrow_date')),
                 name='check_due_date_after_borrow_date'
             )
         ]
+
+
+
+class LateFeeEntry(models.Model):
+    class Reason(models.TextChoices):
+        ACCRUAL = 'accrual', 'Accrual'
+        RETURN = 'return', 'Return'
+
+    borrow_record = models.ForeignKey(BorrowRecord, on_delete=models.CASCADE, related_name='fee_entries')
+    reason = models.CharField(max_length=20, choices=Reason.choices)
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    balance = models.DecimalField(max_digits=10, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.borrow_record_id} {self.reason} {self.amount:+} = {self.balance}'
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('Late fee entries are append-only')
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def for_changes(cls, changes, reason):
+        """Build unsaved entries from (borrow_record_id, old_fee, new_fee) tuples."""
+        return [
+            cls(borrow_record_id=record_id, reason=reason, amount=new_fee - old_fee, balance=new_fee)
+            for record_id, old_fee, new_fee in changes
+            if new_fee != old_fee
+        ]
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['borrow_record', 'created_at'], name='latefee_record_created_idx'),
+        ]
+
+
+class HoldQuerySet(models.QuerySet):
+    def with_queue_position(self):
+        """Annotate `queue_position` (1 = next in line) for waiting holds, None otherwise."""
+        ahead = (
+            Hold.objects.filter(book=models.OuterRef('book'), status=Hold.Status.WAITING)
+            .filter(
+                models.Q(created_at__lt=models.OuterRef('created_at'))
+                | models.Q(created_at=models.OuterRef('created_at'), id__lte=models.OuterRef('id'))
+            )
+            .order_by()
+            .values('book')
+            .annotate(count=models.Count('pk'))
+            .values('count')
+        )
+        return self.annotate(queue_position=models.Case(
+            models.When(status=Hold.Status.WAITING, then=models.Subquery(ahead)),
+            default=None,
+            output_field=models.IntegerField(),
+        ))
+
+
+class Hold(models.Model):
+    """
+    A member's place in the FIFO queue for a book. When a copy is freed the
+    head of the queue is found through hold_queue_idx and the copy is
+    reserved for it (status READY) until PICKUP_PERIOD runs out.
+    """
+    PICKUP_PERIOD = timedelta(days=3)
+
+    class Status(models.TextChoices):
+        WAITING = 'waiting', 'Waiting'
+        READY = 'ready', 'Ready for pickup'
+        FULFILLED = 'fulfilled', 'Fulfilled'
+        CANCELLED = 'cancelled', 'Cancelled'
+        EXPIRED = 'expired', 'Expired'
+
+    ACTIVE_STATUSES = [Status.WAITING, Status.READY]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='holds')
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='holds')
+    book_copy = models.ForeignKey(BookCopy, on_delete=models.SET_NULL, null=True, blank=True, related_name='holds')
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.WAITING)
+    created_at = models.DateTimeField(auto_now_add=True)
+    ready_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+
+    objects = HoldQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['book', 'status', 'created_at', 'id'], name='hold_queue_idx'),
+            models.Index(fields=['status', 'expires_at'], name='hold_status_expiry_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'book'],
+                condition=models.Q(status__in=['waiting', 'ready']),
+                name='hold_one_active_per_member_and_book',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user} - {self.book.title} ({self.get_status_display()})'
+
+    @classmethod
+    def allocate(cls, book_copy, from_status):
+        """
+        Hand a freed copy (currently `from_status`) to the head of its book's
+        queue, or make it available when nobody is waiting. Returns the hold
+        that received the copy, or None. Must be called inside transaction.atomic().
+        """
+        hold = (
+            cls.objects.select_for_update(skip_locked=True, of=('self',))
+            .select_related('user', 'book')
+            .filter(book_id=book_copy.book_id, status=cls.Status.WAITING)
+            .order_by('created_at', 'id')
+            .first()
+        )
+        to_status = BookCopy.Status.RESERVED if hold is not None else BookCopy.Status.AVAILABLE
+        if not book_copy.transition(from_status, to_status) or hold is None:
+            return None
+
+        now = timezone.now()
+        hold.status, hold.book_copy, hold.ready_at, hold.expires_at = cls.Status.READY, book_copy, now, now + cls.PICKUP_PERIOD
+        hold.save(update_fields=['status', 'book_copy', 'ready_at', 'expires_at'])
+        OutboxEmail.enqueue(
+            subject='Library Hold Ready',
+            message=f'"{hold.book.title}" is ready for pickup until {hold.expires_at:%Y-%m-%d %H:%M} UTC.',
+            recipient_list=[hold.user.email],
+        )
+        return hold
+
+    @classmethod
+    def fill_queue(cls, book):
+        """Reserve available copies of `book` for waiting holds, e.g. after copies were added."""
+        allocated = []
+        while cls.objects.filter(book=book, status=cls.Status.WAITING).exists():
+            book_copy = (
+                book.copies.select_for_update(skip_locked=True)
+                .filter(status=BookCopy.Status.AVAILABLE)
+                .order_by('id')
+                .first()
+            )
+            hold = cls.allocate(book_copy, BookCopy.Status.AVAILABLE) if book_copy is not None else None
+            if hold is None:
+                break
+            allocated.append(hold)
+        return allocated
+
+    def fulfil(self):
+        """Borrow the copy reserved for this hold. Returns the copy, or None if it is gone."""
+        if self.status != self.Status.READY or not self.book_copy.transition(
+            BookCopy.Status.RESERVED, BookCopy.Status.BORROWED
+        ):
+            return None
+        self.status = self.Status.FULFILLED
+        self.save(update_fields=['status'])
+        return self.book_copy
+
+    def close(self, status):
+        """Cancel or expire the hold, passing a reserved copy on to the next in line."""
+        book_copy = self.book_copy if self.status == self.Status.READY else None
+        self.status = status
+        self.save(update_fields=['status'])
+        if book_copy is not None:
+            Hold.allocate(book_copy, BookCopy.Status.RESERVED)
@@ -1,7 +1,180 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder cuts datetimes to milliseconds; a keyset needs the exact value."""
+
+    def default(self, o):
+        if isinstance(o, datetime):
+            return {'dt': o.isoformat()}
+        return super().default(o)
+
+
+def decode_keyset_value(obj):
+    if obj.keys() == {'dt'}:
+        return datetime.fromisoformat(obj['dt'])
+    return obj
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Keyset pagination over whatever ordering the queryset already has.
+
+    The cursor stores the full ordering key of the boundary row plus an `id`
+    tiebreak, so pages are stable even when many rows share the first ordering
+    value and no OFFSET or COUNT(*) is ever issued. Ordering fields must be
+    non-nullable.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    tiebreak_field = 'id'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_keyset_ordering(queryset)
+
+        self.reverse, position = self.decode_keyset(request, queryset.model)
+        ordering = [self.flip(field) for field in self.ordering] if self.reverse else self.ordering
+
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.keyset_filter(ordering, position))
+
+        try:
+            results = list(queryset[:self.page_size + 1])
+        except ValidationError:
+            # A value decode_keyset could not check, e.g. for an annotation, that the database rejects.
+            raise NotFound(self.invalid_cursor_message)
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if self.reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        return self.page
+
+    def get_keyset_ordering(self, queryset):
+        ordering = [field for field in queryset.query.order_by if isinstance(field, str)]
+        if not any(field.lstrip('-') in (self.tiebreak_field, 'pk') for field in ordering):
+            descending = ordering[-1].startswith('-') if ordering else True
+            ordering.append(f'-{self.tiebreak_field}' if descending else self.tiebreak_field)
+        return ordering
+
+    @staticmethod
+    def flip(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    def keyset_filter(self, ordering, position):
+        """Rows strictly after `position`: (a > x) OR (a = x AND b > y) OR ..."""
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def decode_keyset(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return False, None
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode('ascii')), object_hook=decode_keyset_value)
+            reverse, position = bool(cursor['r']), cursor['p']
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        # A tampered cursor can carry well-formed JSON of the wrong type for a column.
+        try:
+            position = [
+                value if field is None else field.to_python(value)
+                for field, value in zip(self.get_ordering_model_fields(model), position)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return reverse, position
+
+    def get_ordering_model_fields(self, model):
+        """The model field behind each ordering entry, or None for annotations."""
+        fields = []
+        for entry in self.ordering:
+            field, current = None, model
+            try:
+                for part in entry.lstrip('-').split('__'):
+                    field = current._meta.pk if part == 'pk' else current._meta.get_field(part)
+                    current = field.related_model
+            except (AttributeError, FieldDoesNotExist):
+                field = None
+            fields.append(field)
+        return fields
+
+    def encode_keyset(self, instance, reverse):
+        position = [self.get_value(instance, field.lstrip('-')) for field in self.ordering]
+        payload = json.dumps({'r': int(reverse), 'p': position}, cls=KeysetEncoder)
+        encoded = urlsafe_b64encode(payload.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    @staticmethod
+    def get_value(instance, field_name):
+        for attr in field_name.split('__'):
+            instance = instance[attr] if isinstance(instance, dict) else getattr(instance, attr)
+        return instance
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_keyset(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_keyset(self.page[0], reverse=True)
+
+    def cursor_requested(self, request):
+        return self.cursor_query_param in request.query_params
+
 
 class CustomPageNumberPagination(PageNumberPagination):
-    page_size = 20 
+    page_size = 20
     page_size_query_param = 'page_size'
     max_page_size = 100
-    page_query_param = 'page'
\ No newline at end of file
+    page_query_param = 'page'
+    # Opt-in: requests carrying `?cursor=` (empty for the first page) are paged by keyset.
+    cursor_pagination_class = KeysetCursorPagination
+    cursor_paginator = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        cursor_paginator = self.cursor_pagination_class()
+        if cursor_paginator.cursor_requested(request):
+            self.cursor_paginator = cursor_paginator
+            return cursor_paginator.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_schema_operation_parameters(self, view):
+        cursor_parameters = [
+            parameter for parameter in self.cursor_pagination_class().get_schema_operation_parameters(view)
+            if parameter['name'] == self.cursor_pagination_class.cursor_query_param
+        ]
+        return super().get_schema_operation_parameters(view) + cursor_parameters
@@ -33,7 +33,7 @@ class IsOwnerOrAdmin(IsAuthenticated):
 
         return request.user.is_authenticated and (
             request.user.role == 'admin' or
-            hasattr(obj, 'user') and obj.user == request.user
+            getattr(obj, 'user_id', None) == request.user.id
         )
 
 
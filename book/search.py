@@ -0,0 +1,111 @@
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import F, FloatField, Value
+from django.db.models.expressions import RawSQL
+
+
+FTS_TABLE = 'book_book_fts'
+
+SQLITE_FTS_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS book_book_fts_insert AFTER INSERT ON book_book BEGIN
+        INSERT INTO book_book_fts(rowid, title_normalized, author_normalized, topics_normalized)
+        VALUES (new.id, new.title_normalized, new.author_normalized, new.topics_normalized);
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS book_book_fts_delete AFTER DELETE ON book_book BEGIN
+        INSERT INTO book_book_fts(book_book_fts, rowid, title_normalized, author_normalized, topics_normalized)
+        VALUES ('delete', old.id, old.title_normalized, old.author_normalized, old.topics_normalized);
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS book_book_fts_update
+    AFTER UPDATE OF title_normalized, author_normalized, topics_normalized ON book_book BEGIN
+        INSERT INTO book_book_fts(book_book_fts, rowid, title_normalized, author_normalized, topics_normalized)
+        VALUES ('delete', old.id, old.title_normalized, old.author_normalized, old.topics_normalized);
+        INSERT INTO book_book_fts(rowid, title_normalized, author_normalized, topics_normalized)
+        VALUES (new.id, new.title_normalized, new.author_normalized, new.topics_normalized);
+    END;
+    """,
+]
+
+# bm25() weights per column, mirroring the A/B/C weights of the Postgres vector.
+SQLITE_RANK_SQL = '-bm25(book_book_fts, 10.0, 5.0, 1.0)'
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def ensure_sqlite_fts(using=None, **kwargs):
+    """
+    Create the FTS5 table and its sync triggers on SQLite. Like the Postgres
+    search_vector, it indexes the fold()ed *_normalized columns.
+
+    Runs after every migrate because SQLite drops triggers whenever a
+    migration rebuilds book_book; the index is rebuilt if they were missing.
+    """
+    from django.db import connections
+
+    conn = connections[using or 'default']
+    if conn.vendor != 'sqlite':
+        return
+
+    with conn.cursor() as cursor:
+        tables = conn.introspection.table_names(cursor)
+        if 'book_book' not in tables:
+            return
+        cursor.execute(
+            "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s",
+            ['book_book_fts_%'],
+        )
+        triggers_present = cursor.fetchone()[0] == len(SQLITE_FTS_TRIGGERS)
+
+        if FTS_TABLE not in tables:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                "title_normalized, author_normalized, topics_normalized, "
+                "content='book_book', content_rowid='id')"
+            )
+            triggers_present = False
+
+        for sql in SQLITE_FTS_TRIGGERS:
+            cursor.execute(sql)
+
+        if not triggers_present:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def fts5_query(terms):
+    # Quote every token so user input can never be parsed as FTS5 syntax.
+    tokens = TOKEN_RE.findall(terms)
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def full_text_search(queryset, terms):
+    """
+    Filter a Book queryset to full-text matches and annotate `search_rank`.
+
+    Returns None when the current database has no full-text backend so the
+    caller can fall back to plain icontains search.
+    """
+    if connection.vendor == 'postgresql':
+        query = SearchQuery(terms, config='simple', search_type='websearch')
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+        )
+
+    if connection.vendor == 'sqlite':
+        match = fts5_query(terms)
+        if not match:
+            return queryset.none().annotate(search_rank=Value(0.0))
+        # bm25() is only valid in the query that runs MATCH, so join the FTS
+        # table directly instead of going through a per-row subquery.
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f'{FTS_TABLE}.rowid = book_book.id', f'{FTS_TABLE} MATCH %s'],
+            params=[match],
+        ).annotate(search_rank=RawSQL(SQLITE_RANK_SQL, [], output_field=FloatField()))
+
+    return None
@@ -1,20 +1,36 @@
 from rest_framework import serializers
 from datetime import datetime
-from .models import Book, BookCopy, BorrowRecord
+from decimal import Decimal
+from .models import Book, BookCopy, BookQuerySet, BorrowRecord, Hold
+from user.models import User
 
 
 class BookListModelSerializer(serializers.ModelSerializer):
+    copy_counts = serializers.SerializerMethodField()
+
     class Meta:
         model = Book
-        fields = ['id', 'title', 'author', 'publication_year', 'language', 'topics']
-        read_only_fields = ['id']
+        fields = ['id', 'title', 'author', 'publication_year', 'language', 'topics', 'available_count', 'copy_counts']
+        read_only_fields = ['id', 'available_count']
+
+    def get_fields(self):
+        fields = super().get_fields()
+        # Opt-in: only present when the view annotated the queryset with with_copy_counts().
+        if not self.context.get('include_availability'):
+            fields.pop('copy_counts')
+        return fields
+
+    def get_copy_counts(self, obj):
+        return {status: getattr(obj, field) for status, field in BookQuerySet.COPY_COUNT_FIELDS.items()}
         
 
 class BookModelSerializer(serializers.ModelSerializer):
+    topic_tags = serializers.SlugRelatedField(many=True, read_only=True, slug_field='name')
+
     class Meta:
         model = Book
-        fields = '__all__'
-        read_only_fields = ['id']
+        exclude = ['search_vector', 'title_normalized', 'author_normalized', 'topics_normalized']
+        read_only_fields = ['id', 'available_count']
         extra_kwargs = {
             'publication_year': {'required': False, 'allow_null': True}
         }
@@ -34,26 +50,104 @@ class BookCopyModelSerializer(serializers.ModelSerializer):
 
 
 class BorrowRecordModelSerializer(serializers.ModelSerializer):
+    book = serializers.PrimaryKeyRelatedField(queryset=Book.objects.all(), write_only=True, required=False)
+    accrued_fee = serializers.SerializerMethodField()
+
     class Meta:
         model = BorrowRecord
         fields = '__all__'
         read_only_fields = ['id', 'borrow_date', 'late_fee', 'user', 'due_date']
+        extra_kwargs = {
+            'book_copy': {'required': False}
+        }
+
+    def get_accrued_fee(self, obj):
+        # Querysets from BorrowRecord.objects.with_accrued_fee() carry the value already.
+        fee = getattr(obj, 'accrued_fee', None)
+        if fee is None:
+            fee = obj.calculated_late_fee()
+        return str(Decimal(fee).quantize(Decimal('0.01')))
 
     def validate_book_copy(self, value):
+        if value.status == BookCopy.Status.RESERVED and value.holds.filter(
+            user_id=self.context['request'].user.id, status=Hold.Status.READY
+        ).exists():
+            return value
         if value.status != BookCopy.Status.AVAILABLE:
             raise serializers.ValidationError('Book copy not available')
         return value
 
     def validate(self, attrs):
+        if ('book' in attrs) == ('book_copy' in attrs):
+            raise serializers.ValidationError('Provide either book or book_copy')
+
         user = self.context['request'].user
-        active_borrows = BorrowRecord.objects.filter(user=user, return_date__isnull=True).count()
+        active_borrows = BorrowRecord.objects.filter(user_id=user.id, return_date__isnull=True).count()
         if active_borrows >= user.borrow_limit:
             raise serializers.ValidationError('Borrow limit reached')
         return attrs
-        
-    def create(self, validated_data):
-        borrow = BorrowRecord.objects.create(**validated_data)
-        book_copy = borrow.book_copy
-        book_copy.status = BookCopy.Status.BORROWED
-        book_copy.save(update_fields=['status'])
-        return borrow
+
+
+class BulkCheckoutSerializer(serializers.Serializer):
+    user = serializers.PrimaryKeyRelatedField(queryset=User.objects.all())
+    book_copies = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=200)
+
+
+class BulkReturnSerializer(serializers.Serializer):
+    records = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=200)
+
+
+class BookCopyProvisionSerializer(serializers.Serializer):
+    OPERATIONS = ['add', 'remove', 'set_status']
+    # Borrowed copies are only created and released by the borrow/return endpoints.
+    MANAGED_STATUSES = [BookCopy.Status.AVAILABLE, BookCopy.Status.MAINTENANCE]
+
+    operation = serializers.ChoiceField(choices=OPERATIONS)
+    count = serializers.IntegerField(min_value=1, max_value=500)
+    status = serializers.ChoiceField(choices=MANAGED_STATUSES, default=BookCopy.Status.AVAILABLE)
+    to_status = serializers.ChoiceField(choices=MANAGED_STATUSES, required=False)
+
+    def validate(self, attrs):
+        if attrs['operation'] == 'set_status':
+            if 'to_status' not in attrs:
+                raise serializers.ValidationError({'to_status': 'This field is required for set_status.'})
+            if attrs['to_status'] == attrs['status']:
+                raise serializers.ValidationError({'to_status': 'Must differ from status.'})
+        return attrs
+
+
+class BookAvailabilityQuerySerializer(serializers.Serializer):
+    ids = serializers.CharField(help_text='Comma separated book ids, at most 500.')
+
+    MAX_IDS = 500
+
+    def validate_ids(self, value):
+        try:
+            ids = {int(part) for part in value.split(',') if part.strip()}
+        except ValueError:
+            raise serializers.ValidationError('ids must be comma separated integers')
+        if not ids:
+            raise serializers.ValidationError('At least one id is required')
+        if len(ids) > self.MAX_IDS:
+            raise serializers.ValidationError(f'At most {self.MAX_IDS} ids per request')
+        return sorted(ids)
+
+
+class HoldModelSerializer(serializers.ModelSerializer):
+    queue_position = serializers.IntegerField(read_only=True, allow_null=True)
+
+    class Meta:
+        model = Hold
+        fields = ['id', 'user', 'book', 'book_copy', 'status', 'queue_position', 'created_at', 'ready_at', 'expires_at']
+        read_only_fields = ['id', 'user', 'book_copy', 'status', 'created_at', 'ready_at', 'expires_at']
+
+    def validate_book(self, value):
+        if value.available_count > 0:
+            raise serializers.ValidationError('Copies of this book are available, borrow one instead')
+        return value
+
+    def validate(self, attrs):
+        user = self.context['request'].user
+        if Hold.objects.filter(user_id=user.id, book=attrs['book'], status__in=Hold.ACTIVE_STATUSES).exists():
+            raise serializers.ValidationError('You already have an active hold on this book')
+        return attrs
@@ -1,17 +1,37 @@
-from django.db.models.signals import post_save, pre_save
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models.signals import post_save, pre_save, post_delete
+from django.db import transaction
 from django.dispatch import receiver
 from .models import Book, BookCopy, BorrowRecord
+from .cache import invalidate_books
+from .suggest import suggestion_index
 
 
 
 @receiver(post_save, sender=Book)
 def inform_about_book(sender, instance, created, **kwargs):
+    invalidate_books([instance.pk])
     if created:
         print('New book is created with title:', instance.title)
     else:
         print('New book is updated with title:', instance.title)
 
 
+@receiver(post_save, sender=Book)
+def index_book_suggestions(sender, instance, **kwargs):
+    book_id, title, author = instance.pk, instance.title, instance.author
+    transaction.on_commit(lambda: suggestion_index.update(book_id, title, author))
+
+
+@receiver(post_delete, sender=Book)
+def forget_deleted_book(sender, instance, **kwargs):
+    invalidate_books([instance.pk])
+    book_id = instance.pk
+    transaction.on_commit(lambda: suggestion_index.discard(book_id))
+
+
 @receiver(pre_save, sender=Book)
 def validate_book(sender, instance, **kwargs):
     if Book.objects.filter(isbn=instance.isbn).exclude(id=instance.id).exists():
@@ -20,6 +40,7 @@ def validate_book(sender, instance, **kwargs):
 
 @receiver(post_save, sender=BookCopy)
 def inform_about_book_copy(sender, instance, created, **kwargs):
+    invalidate_books([instance.book_id])
     if created:
         print('New bookcopy is created for book:', instance.book.title)
     else:
@@ -32,6 +53,25 @@ def validate_book_copy(sender, instance, **kwargs):
         raise ValueError('Invalid status for bookcopy')
 
 
+_counted_by_caller = ContextVar('copy_deletes_counted_by_caller', default=False)
+
+
+@contextmanager
+def copy_deletes_counted_by_caller():
+    """Skip the per-copy counter update below; the caller adjusts the book once for the whole batch."""
+    token = _counted_by_caller.set(True)
+    try:
+        yield
+    finally:
+        _counted_by_caller.reset(token)
+
+
+@receiver(post_delete, sender=BookCopy)
+def release_available_copy(sender, instance, **kwargs):
+    if instance.is_available() and not _counted_by_caller.get():
+        Book.adjust_available_count(instance.book_id, -1)
+
+
 @receiver(post_save, sender=BorrowRecord)
 def inform_about_borrow_record(sender, instance, created, **kwargs):
     if created:
@@ -0,0 +1,157 @@
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.db import connections
+
+from .text import fold
+
+
+TERM_LENGTH = 32
+MAX_TITLE_WORDS = 8
+MAX_AUTHOR_WORDS = 4
+MIN_QUERY_LENGTH = 2
+MAX_SUGGESTIONS = 10
+WORD_RE = re.compile(r'\w+')
+
+
+def normalize(text):
+    """Fold like the search columns and keep only words, so 'Çalı' and 'cali' share a prefix."""
+    return ' '.join(WORD_RE.findall(fold(text)))
+
+
+def index_terms(title, author):
+    """
+    Every word-start suffix of the normalized title and author, cut to
+    TERM_LENGTH, so both 'lord of' and 'rings' complete 'The Lord of the Rings'.
+    """
+    terms = set()
+    for text, max_words in ((title, MAX_TITLE_WORDS), (author, MAX_AUTHOR_WORDS)):
+        words = normalize(text).split()[:max_words]
+        for start in range(len(words)):
+            terms.add(' '.join(words[start:])[:TERM_LENGTH])
+    return terms
+
+
+class PrefixIndex:
+    """
+    Sorted array of 'term\\x00book_id' keys searched with bisect, plus the
+    title and author of each indexed book for rendering suggestions.
+
+    Memory per book is bounded by MAX_TITLE_WORDS + MAX_AUTHOR_WORDS keys of
+    at most TERM_LENGTH characters. The index is built lazily from the
+    database, patched from the Book signals of this process, and rebuilt
+    after SUGGEST_INDEX_MAX_AGE seconds to pick up changes made by other
+    workers or by bulk SQL such as import_catalog. Only the first build
+    blocks a request; rebuilds run in a background thread and are swapped
+    in whole.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys = None
+        self._books = {}
+        self._built_at = 0.0
+        # Book changes seen while a rebuild runs, replayed onto its result: {book_id: (title, author) | None}.
+        self._missed = None
+        self._rebuild_thread = None
+
+    def _max_age(self):
+        return getattr(settings, 'SUGGEST_INDEX_MAX_AGE', 300)
+
+    def _ensure_built(self):
+        if self._keys is not None and time.monotonic() - self._built_at < self._max_age():
+            return
+        with self._lock:
+            if self._keys is None:
+                # Nothing to serve yet, so only the first build blocks.
+                self._keys, self._books = self._load()
+                self._built_at = time.monotonic()
+                return
+            if self._missed is not None or time.monotonic() - self._built_at < self._max_age():
+                return
+            # Later rebuilds run in the background while the stale index keeps answering.
+            self._missed = {}
+            self._rebuild_thread = threading.Thread(target=self._rebuild_in_background, daemon=True)
+            self._rebuild_thread.start()
+
+    def _rebuild_in_background(self):
+        try:
+            keys, books = self._load()
+            with self._lock:
+                if self._keys is not None:
+                    for book_id, entry in self._missed.items():
+                        self._apply(keys, books, book_id, entry)
+                    self._keys, self._books, self._built_at = keys, books, time.monotonic()
+        finally:
+            with self._lock:
+                self._missed = None
+            connections.close_all()
+
+    def _load(self):
+        from .models import Book
+
+        keys, books = [], {}
+        for book_id, title, author in Book.objects.values_list('id', 'title', 'author').iterator(chunk_size=5000):
+            books[book_id] = (title, author)
+            keys.extend(f'{term}\x00{book_id}' for term in index_terms(title, author))
+        keys.sort()
+        return keys, books
+
+    @staticmethod
+    def _apply(keys, books, book_id, entry):
+        """Replace book_id's keys in `keys`/`books` with those of entry=(title, author), or drop them for None."""
+        if book_id in books:
+            title, author = books.pop(book_id)
+            for term in index_terms(title, author):
+                key = f'{term}\x00{book_id}'
+                position = bisect_left(keys, key)
+                if position < len(keys) and keys[position] == key:
+                    del keys[position]
+        if entry is not None:
+            books[book_id] = entry
+            for term in index_terms(*entry):
+                insort(keys, f'{term}\x00{book_id}')
+
+    def _change(self, book_id, entry):
+        with self._lock:
+            if self._keys is None:
+                return
+            self._apply(self._keys, self._books, book_id, entry)
+            if self._missed is not None:
+                self._missed[book_id] = entry
+
+    def update(self, book_id, title, author):
+        """Re-index one book. A no-op until the index has been built."""
+        self._change(book_id, (title, author))
+
+    def discard(self, book_id):
+        self._change(book_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._keys, self._books = None, {}
+
+    def suggest(self, query, limit=MAX_SUGGESTIONS):
+        prefix = normalize(query)[:TERM_LENGTH]
+        if len(prefix) < MIN_QUERY_LENGTH:
+            return []
+        self._ensure_built()
+
+        keys, books = self._keys, self._books
+        found = {}
+        position = bisect_left(keys, prefix)
+        while position < len(keys) and len(found) < limit:
+            key = keys[position]
+            if not key.startswith(prefix):
+                break
+            book_id = int(key.rpartition('\x00')[2])
+            if book_id in books:
+                found.setdefault(book_id, books[book_id])
+            position += 1
+        return [{'id': book_id, 'title': title, 'author': author} for book_id, (title, author) in found.items()]
+
+
+suggestion_index = PrefixIndex()
@@ -1,3 +1,494 @@
-from django.test import TestCase
+import csv
+import json
+import os
+import tempfile
+from base64 import urlsafe_b64encode
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import Sum
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from user.authentication import ClaimsRefreshToken
+from user.models import User
+from .cache import catalog_cache
+from .models import Book, BookCopy, BorrowRecord, Hold, LateFeeEntry
+from .suggest import PrefixIndex
+
+
+class LibraryTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        catalog_cache().clear()
+        self.member = User.objects.create_user(username='member', email='member@example.com', password='x')
+        self.librarian = User.objects.create_user(
+            username='librarian', email='librarian@example.com', password='x', role=User.Role.LIBRARIAN
+        )
+        self.book = Book.objects.create(title='Dune', author='Frank Herbert', isbn='9780441013593',
+                                        publication_year=1965, total_copies=0)
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def add_copies(self, count, book=None):
+        book = book or self.book
+        copies = [BookCopy.objects.create(book=book) for _ in range(count)]
+        book.refresh_from_db()
+        return copies
+
+
+class CursorPaginationTests(LibraryTestCase):
+    def test_cursor_keeps_microseconds_of_datetime_keys(self):
+        copy, = self.add_copies(1)
+        started = timezone.now().replace(microsecond=0)
+        ids = []
+        for step in range(6):
+            record = BorrowRecord.objects.create(user=self.member, book_copy=copy,
+                                                 due_date=started + timedelta(days=14))
+            # All six share one millisecond; only the microseconds tell them apart.
+            BorrowRecord.objects.filter(pk=record.pk).update(borrow_date=started + timedelta(microseconds=step * 10))
+            ids.append(record.pk)
+
+        client = self.client_for(self.member)
+        url, seen = '/api/my-borrows/?cursor=&page_size=2', []
+        while url:
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen += [row['id'] for row in response.data['results']]
+            url = response.data['next']
+
+        self.assertEqual(seen, ids[::-1])
+
+    def test_garbled_cursor_is_not_found(self):
+        response = self.client_for(self.member).get('/api/my-borrows/?cursor=bm9wZQ==')
+        self.assertEqual(response.status_code, 404)
+
+    def test_cursor_with_values_of_the_wrong_type_is_not_found(self):
+        copy, = self.add_copies(1)
+        BorrowRecord.objects.create(user=self.member, book_copy=copy)
+        client = self.client_for(self.member)
+
+        for position in (['yesterday', 1], [{'dt': timezone.now().isoformat()}, 'one'], [[1], {'a': 1}]):
+            cursor = urlsafe_b64encode(json.dumps({'r': 0, 'p': position}).encode()).decode()
+            with self.subTest(position=position):
+                self.assertEqual(client.get(f'/api/my-borrows/?cursor={cursor}').status_code, 404)
+
+
+class BorrowReturnTests(LibraryTestCase):
+    def test_second_borrow_of_the_same_copy_fails(self):
+        copy, = self.add_copies(1)
+        client = self.client_for(self.member)
+
+        first = client.post('/api/borrow/', {'book_copy': copy.pk}, format='json')
+        second = client.post('/api/borrow/', {'book_copy': copy.pk}, format='json')
+
+        self.assertEqual(first.status_code, 201)
+        self.assertIn(second.status_code, (400, 409))
+        self.assertEqual(BorrowRecord.objects.filter(book_copy=copy).count(), 1)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.available_count, 0)
+
+    def test_racing_transitions_only_one_wins(self):
+        copy, = self.add_copies(1)
+        # Two requests that both read the copy while it was still available.
+        mine, theirs = BookCopy.objects.get(pk=copy.pk), BookCopy.objects.get(pk=copy.pk)
+
+        self.assertTrue(mine.transition(BookCopy.Status.AVAILABLE, BookCopy.Status.BORROWED))
+        self.assertFalse(theirs.transition(BookCopy.Status.AVAILABLE, BookCopy.Status.BORROWED))
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.available_count, 0)
+
+    def test_saving_a_stale_copy_counts_from_the_stored_status(self):
+        copy, = self.add_copies(1)
+        stale = BookCopy.objects.get(pk=copy.pk)
+        # Borrowed after `stale` was loaded, e.g. while a librarian edits the copy.
+        self.assertTrue(copy.transition(BookCopy.Status.AVAILABLE, BookCopy.Status.BORROWED))
+
+        stale.status = BookCopy.Status.MAINTENANCE
+        stale.save()
+
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.available_count, 0)
+        stale.status = BookCopy.Status.AVAILABLE
+        stale.save()
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.available_count, 1)
+
+    def test_second_return_fails(self):
+        self.add_copies(1)
+        client = self.client_for(self.member)
+        record_id = client.post('/api/borrow/', {'book': self.book.pk}, format='json').data['record']['id']
+
+        first = client.post(f'/api/return/{record_id}/')
+        second = client.post(f'/api/return/{record_id}/')
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 409)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.available_count, 1)
+        self.assertEqual(BookCopy.objects.get(book=self.book).status, BookCopy.Status.AVAILABLE)
+
+    def test_borrow_by_book_fails_once_no_copy_is_left(self):
+        self.add_copies(1)
+        client = self.client_for(self.member)
+
+        self.assertEqual(client.post('/api/borrow/', {'book': self.book.pk}, format='json').status_code, 201)
+        response = client.post('/api/borrow/', {'book': self.book.pk}, format='json')
+
+        self.assertEqual(response.status_code, 409)
+
+
+class LateFeeTests(LibraryTestCase):
+    def overdue_loan(self, days):
+        copy, = self.add_copies(1)
+        record = BorrowRecord.objects.create(user=self.member, book_copy=copy)
+        BookCopy.objects.filter(pk=copy.pk).update(status=BookCopy.Status.BORROWED)
+        self.make_overdue(record, days)
+        return record
+
+    def make_overdue(self, record, days):
+        due_date = timezone.now() - timedelta(days=days, hours=1)
+        BorrowRecord.objects.filter(pk=record.pk).update(borrow_date=due_date - BorrowRecord.LOAN_PERIOD,
+                                                         due_date=due_date)
+
+    def test_accrual_writes_the_ledger(self):
+        record = self.overdue_loan(3)
+
+        call_command('accrue_late_fees', stdout=StringIO())
+        call_command('accrue_late_fees', stdout=StringIO())
+
+        record.refresh_from_db()
+        self.assertEqual(record.late_fee, 3)
+        entries = LateFeeEntry.objects.filter(borrow_record=record)
+        self.assertEqual([(entry.reason, entry.amount) for entry in entries], [(LateFeeEntry.Reason.ACCRUAL, 3)])
+
+    def test_return_books_the_fee_on_top_of_the_accrued_one(self):
+        record = self.overdue_loan(3)
+        call_command('accrue_late_fees', stdout=StringIO())
+        self.make_overdue(record, 5)
+
+        response = self.client_for(self.member).post(f'/api/return/{record.pk}/')
+
+        self.assertEqual(response.status_code, 200)
+        record.refresh_from_db()
+        self.assertEqual(record.late_fee, 5)
+        entries = LateFeeEntry.objects.filter(borrow_record=record).order_by('id')
+        self.assertEqual([(entry.reason, entry.amount, entry.balance) for entry in entries], [
+            (LateFeeEntry.Reason.ACCRUAL, 3, 3),
+            (LateFeeEntry.Reason.RETURN, 2, 5),
+        ])
+        self.assertEqual(entries.aggregate(total=Sum('amount'))['total'], record.late_fee)
+
+    def test_other_members_cannot_return_a_loan(self):
+        record = self.overdue_loan(1)
+        other = User.objects.create_user(username='other', email='other@example.com', password='x')
+
+        response = self.client_for(other).post(f'/api/return/{record.pk}/')
+
+        self.assertEqual(response.status_code, 403)
+        record.refresh_from_db()
+        self.assertIsNone(record.return_date)
+        self.assertFalse(LateFeeEntry.objects.exists())
+
+
+class ProvisionCopiesTests(LibraryTestCase):
+    def provision(self, **data):
+        return self.client_for(self.librarian).post(f'/api/books/{self.book.pk}/copies/', data, format='json')
+
+    def assertCounts(self, total, available):
+        self.book.refresh_from_db()
+        self.assertEqual((self.book.total_copies, self.book.available_count), (total, available))
+        self.assertEqual(self.book.copies.count(), total)
+        self.assertEqual(self.book.copies.filter(status=BookCopy.Status.AVAILABLE).count(), available)
+
+    def test_add_and_remove(self):
+        self.assertEqual(self.provision(operation='add', count=3).status_code, 200)
+        self.assertEqual(self.provision(operation='add', count=2, status='maintenance').status_code, 200)
+        self.assertCounts(5, 3)
+
+        self.assertEqual(self.provision(operation='remove', count=2).status_code, 200)
+        self.assertEqual(self.provision(operation='remove', count=1, status='maintenance').status_code, 200)
+        self.assertCounts(2, 1)
+
+    def test_set_status(self):
+        self.provision(operation='add', count=3)
+
+        response = self.provision(operation='set_status', count=2, status='available', to_status='maintenance')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertCounts(3, 1)
+
+    def test_copies_with_loan_history_are_kept(self):
+        self.provision(operation='add', count=2)
+        borrowed = self.book.copies.earliest('id')
+        record = BorrowRecord.objects.create(user=self.member, book_copy=borrowed)
+        BorrowRecord.objects.filter(pk=record.pk).update(return_date=timezone.now())
+
+        self.assertEqual(self.provision(operation='remove', count=2).status_code, 409)
+        self.assertCounts(2, 2)
+
+        self.assertEqual(self.provision(operation='remove', count=1).status_code, 200)
+        self.assertCounts(1, 1)
+        self.assertTrue(BookCopy.objects.filter(pk=borrowed.pk).exists())
+
+    def test_remove_runs_a_fixed_number_of_queries(self):
+        self.provision(operation='add', count=60)
+        client = self.client_for(self.librarian)
+        url = f'/api/books/{self.book.pk}/copies/'
+
+        with self.assertNumQueries(12):
+            self.assertEqual(client.post(url, {'operation': 'remove', 'count': 50}, format='json').status_code, 200)
+        with self.assertNumQueries(12):
+            self.assertEqual(client.post(url, {'operation': 'remove', 'count': 5}, format='json').status_code, 200)
+
+        self.assertCounts(5, 5)
+
+    def test_remove_copy_a_closed_hold_points_at(self):
+        response = self.client_for(self.member).post('/api/holds/', {'book': self.book.pk}, format='json')
+        hold = Hold.objects.get(pk=response.data['id'])
+        self.provision(operation='add', count=1)
+        hold.refresh_from_db()
+        self.assertEqual(hold.status, Hold.Status.READY)
+        self.client_for(self.member).post(f'/api/holds/{hold.pk}/cancel/')
+
+        self.assertEqual(self.provision(operation='remove', count=1).status_code, 200)
+
+        self.assertCounts(0, 0)
+        hold.refresh_from_db()
+        self.assertEqual((hold.status, hold.book_copy_id), (Hold.Status.CANCELLED, None))
+
+
+class HoldTests(LibraryTestCase):
+    def setUp(self):
+        super().setUp()
+        self.copy, = self.add_copies(1)
+        self.holder = User.objects.create_user(username='holder', email='holder@example.com', password='x')
+        self.record_id = self.borrow(self.member).data['record']['id']
+
+    def borrow(self, user):
+        return self.client_for(user).post('/api/borrow/', {'book': self.book.pk}, format='json')
+
+    def place_hold(self, user):
+        response = self.client_for(user).post('/api/holds/', {'book': self.book.pk}, format='json')
+        self.assertEqual(response.status_code, 201)
+        return Hold.objects.get(pk=response.data['id'])
+
+    def give_back(self):
+        self.assertEqual(self.client_for(self.member).post(f'/api/return/{self.record_id}/').status_code, 200)
+
+    def test_returned_copy_is_reserved_for_the_head_of_the_queue(self):
+        first, second = self.place_hold(self.holder), self.place_hold(self.librarian)
+        self.give_back()
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.status, first.book_copy_id), (Hold.Status.READY, self.copy.pk))
+        self.assertEqual(second.status, Hold.Status.WAITING)
+        self.copy.refresh_from_db()
+        self.assertEqual(self.copy.status, BookCopy.Status.RESERVED)
+        # The reserved copy is not up for grabs.
+        self.assertEqual(self.borrow(self.member).status_code, 409)
+
+        self.assertEqual(self.borrow(self.holder).status_code, 201)
+        first.refresh_from_db()
+        self.assertEqual(first.status, Hold.Status.FULFILLED)
+
+    def test_availability_reflects_a_copy_handed_to_a_hold(self):
+        self.place_hold(self.holder)
+        client = self.client_for(self.member)
+        url = f'/api/books/availability/?ids={self.book.pk}'
+        counts = client.get(url).data['results'][0]
+        self.assertEqual((counts['borrowed'], counts['reserved']), (1, 0))
+        updated_at = Book.objects.get(pk=self.book.pk).updated_at
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.give_back()
+
+        counts = client.get(url).data['results'][0]
+        self.assertEqual((counts['borrowed'], counts['reserved']), (0, 1))
+        self.assertGreater(Book.objects.get(pk=self.book.pk).updated_at, updated_at)
+
+    def test_cancelling_a_ready_hold_passes_the_copy_on(self):
+        first, second = self.place_hold(self.holder), self.place_hold(self.librarian)
+        self.give_back()
+
+        response = self.client_for(self.holder).post(f'/api/holds/{first.pk}/cancel/')
+
+        self.assertEqual(response.status_code, 200)
+        second.refresh_from_db()
+        self.assertEqual((second.status, second.book_copy_id), (Hold.Status.READY, self.copy.pk))
+        response = self.client_for(self.holder).post(f'/api/holds/{first.pk}/cancel/')
+        self.assertEqual(response.status_code, 409)
+
+    def test_expired_hold_releases_the_copy(self):
+        hold = self.place_hold(self.holder)
+        self.give_back()
+        Hold.objects.filter(pk=hold.pk).update(expires_at=timezone.now() - timedelta(minutes=1))
+
+        call_command('expire_holds', stdout=StringIO())
+
+        hold.refresh_from_db()
+        self.assertEqual(hold.status, Hold.Status.EXPIRED)
+        self.copy.refresh_from_db()
+        self.assertEqual(self.copy.status, BookCopy.Status.AVAILABLE)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.available_count, 1)
+
+
+class AvailabilityStreamTests(LibraryTestCase):
+    url = '/api/books/availability/stream/'
+
+    async def open_stream(self, client, **headers):
+        return await client.get(self.url, {'ids': str(self.book.pk)}, headers=headers)
+
+    async def test_requires_authentication(self):
+        response = await self.open_stream(AsyncClient())
+        self.assertEqual(response.status_code, 401)
+
+    async def test_sends_a_snapshot_first(self):
+        client = AsyncClient()
+        await client.aforce_login(self.member)
+
+        response = await self.open_stream(client)
+
+        self.assertEqual(response.status_code, 200)
+        first = await anext(aiter(response.streaming_content))
+        self.assertIn(b'event: snapshot', first)
+        response.close()
+
+    async def test_accepts_access_tokens(self):
+        access = await sync_to_async(lambda: str(ClaimsRefreshToken.for_user(self.member).access_token))()
+
+        response = await self.open_stream(AsyncClient(), authorization=f'Bearer {access}')
+        self.assertEqual(response.status_code, 200)
+        response.close()
+
+        response = await self.open_stream(AsyncClient(), authorization='Bearer not-a-token')
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(AVAILABILITY_STREAM_MAX_PER_CLIENT=1)
+    async def test_caps_open_streams_per_user(self):
+        client = AsyncClient()
+        await client.aforce_login(self.member)
+
+        first = await self.open_stream(client)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual((await self.open_stream(client)).status_code, 429)
+
+        first.close()
+        second = await self.open_stream(client)
+        self.assertEqual(second.status_code, 200)
+        second.close()
+
+    def test_not_served_under_wsgi(self):
+        self.client.force_login(self.member)
+        response = self.client.get(self.url, {'ids': str(self.book.pk)})
+        self.assertEqual(response.status_code, 501)
+
+
+class SuggestIndexTests(TransactionTestCase):
+    def add_books(self, *titles):
+        # bulk_create skips the signals that patch the index, like imports by other workers.
+        Book.objects.bulk_create(
+            Book(title=title, author='Frank Herbert', isbn=f'97800000000{n:02}', publication_year=1965)
+            for n, title in enumerate(titles, start=Book.objects.count())
+        )
+
+    def titles(self, index, query):
+        return sorted(row['title'] for row in index.suggest(query))
+
+    def test_rebuild_serves_the_stale_index_until_swapped_in(self):
+        index = PrefixIndex()
+        self.add_books('Dune')
+        self.assertEqual(self.titles(index, 'du'), ['Dune'])
+        self.add_books('Dune Messiah')
+
+        with override_settings(SUGGEST_INDEX_MAX_AGE=0):
+            self.assertEqual(self.titles(index, 'du'), ['Dune'])
+            rebuild = index._rebuild_thread
+            # Changes made while the rebuild runs survive the swap.
+            index.update(999, 'Dune Encyclopedia', 'Willis McNelly')
+        rebuild.join(timeout=10)
+
+        self.assertEqual(self.titles(index, 'du'), ['Dune', 'Dune Encyclopedia', 'Dune Messiah'])
+
+
+class ImportCatalogTests(TestCase):
+    def import_rows(self, rows, fmt='jsonl', **options):
+        with tempfile.NamedTemporaryFile('w', suffix=f'.{fmt}', delete=False) as source:
+            if fmt == 'jsonl':
+                source.write('\n'.join(json.dumps(row) for row in rows))
+            else:
+                writer = csv.DictWriter(source, fieldnames=list(rows[0]))
+                writer.writeheader()
+                writer.writerows(rows)
+        self.addCleanup(os.unlink, source.name)
+        errors = StringIO()
+        call_command('import_catalog', source.name, stdout=StringIO(), stderr=errors, **options)
+        return errors.getvalue()
+
+    def row(self, isbn, **fields):
+        return {'title': 'Dune', 'author': 'Frank Herbert', 'isbn': isbn, 'publication_year': 1965, **fields}
+
+    def copies_of(self, isbn):
+        book = Book.objects.get(isbn=isbn)
+        return book.total_copies, book.available_count, book.copies.count()
+
+    def test_copies_column(self):
+        errors = self.import_rows([
+            self.row('1', copies=0), self.row('2', copies=3), self.row('3'), self.row('4', copies=None),
+            self.row('5', copies=-1),
+        ], default_copies=2)
+
+        self.assertEqual(self.copies_of('1'), (0, 0, 0))
+        self.assertEqual(self.copies_of('2'), (3, 3, 3))
+        self.assertEqual(self.copies_of('3'), (2, 2, 2))
+        self.assertEqual(self.copies_of('4'), (2, 2, 2))
+        self.assertFalse(Book.objects.filter(isbn='5').exists())
+        self.assertIn('copies cannot be negative', errors)
+
+    def test_warns_when_the_catalog_cache_is_process_local(self):
+        self.assertIn('catalog cache is process-local', self.import_rows([self.row('1')]))
+
+        shared = {**settings.CACHES, 'catalog': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+        with override_settings(CACHES=shared):
+            self.assertNotIn('process-local', self.import_rows([self.row('2')]))
+
+    def test_blank_csv_copies_use_the_default(self):
+        self.import_rows([self.row('1', copies=''), self.row('2', copies='0')], fmt='csv')
+
+        self.assertEqual(self.copies_of('1'), (1, 1, 1))
+        self.assertEqual(self.copies_of('2'), (0, 0, 0))
+
+
+class ConditionalListTests(LibraryTestCase):
+    url = '/api/books/'
+
+    def test_list_etag_depends_on_database_state_only(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Last-Modified', response)
+        etag = response['ETag']
+
+        # Another worker: nothing shared in a process-local cache.
+        catalog_cache().clear()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_deleting_a_listed_book_changes_the_etag(self):
+        other = Book.objects.create(title='Emma', author='Jane Austen', isbn='9780141439587', publication_year=1815)
+        etag = self.client.get(self.url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other.delete()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.data['results']], [self.book.pk])
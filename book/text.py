@@ -0,0 +1,18 @@
+import unicodedata
+
+
+# Turkish and Azerbaijani letters that Unicode case folding does not map to
+# their ASCII search equivalents: dotted/dotless I and schwa.
+TURKIC_FOLD = str.maketrans({'İ': 'i', 'I': 'i', 'ı': 'i', 'Ə': 'e', 'ə': 'e'})
+
+
+def fold(text):
+    """
+    Locale-aware search key: Turkic i/ı/İ and ə folded, then Unicode case
+    folding, diacritics stripped and whitespace collapsed.
+
+    fold('İSTANBUL') == fold('istanbul') == 'istanbul'
+    fold('Çalıkuşu') == 'calikusu'
+    """
+    decomposed = unicodedata.normalize('NFKD', (text or '').translate(TURKIC_FOLD).casefold())
+    return ' '.join(''.join(char for char in decomposed if not unicodedata.combining(char)).split())
@@ -0,0 +1,6 @@
+from rest_framework.throttling import UserRateThrottle
+
+
+class SuggestRateThrottle(UserRateThrottle):
+    """Autocomplete fires per keystroke, so it gets its own, larger budget per user or IP."""
+    scope = 'suggest'
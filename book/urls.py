@@ -7,29 +7,49 @@ from rest_framework.routers import DefaultRouter
 router = DefaultRouter()
 router.register('books', views.BookViewSet, basename='books')
 router.register('copies', views.BookCopyViewSet, basename='copies')
+router.register('holds', views.HoldViewSet, basename='holds')
 
 urlpatterns = [
     path('health_check/', views.HealthCheckAPIView.as_view(), name='health-check'),
     path('borrow/', views.BorrowRecordAPIView.as_view(), name='borrow-book'),
+    path('borrow/bulk/', views.BulkCheckoutAPIView.as_view(), name='bulk-borrow'),
     path('borrows/', views.BorrowListAPIView.as_view(), name='borrow-list'),
+    path('return/bulk/', views.BulkReturnAPIView.as_view(), name='bulk-return'),
     path('return/<int:id>/', views.BorrowRecordAPIView.as_view(), name='return-book'),
     path('my-borrows/', views.BorrowRecordAPIView.as_view(), name='my-borrows'),
     path('mark-fee-paid/<int:id>/', views.MarkFeePaidAPIView.as_view(), name='mark-fee-paid'),
+    path('export/<str:dataset>/', views.ExportAPIView.as_view(), name='export'),
+    path('books/availability/stream/', views.availability_stream, name='availability-stream'),
 ]
 
 urlpatterns += router.urls
 
 """
 books/ - list
+books/?search=term - ranked full-text search
 books/ - create
 books/id/ - retrieve
 books/id/ - update|partial_update
 books/id/ - destroy
 books/id/available_copies/ - available copies
+books/suggest/?q= - title/author autocomplete from an in-memory prefix index
+books/availability/?ids=1,2,3 - available/borrowed/maintenance/reserved counts for up to 500 books
+books/availability/stream/?ids=1,2,3 - server-sent events with availability changes (ASGI only, authenticated, capped per user)
+books/?include=availability - adds the same counts to each listed book
+books/facets/ - counts per topic, language and decade for the same filters as books/
+books/id/copies/ - POST {operation: add|remove|set_status, count, status, to_status} bulk copy provisioning (librarian/admin)
 copies/ - list|create|update|delete
-borrow/ - borrow a book copy {'book_copy': 1}
+holds/ - list own holds with queue_position (all holds for librarian/admin), filter by status/book_id/user_id
+holds/ - place a hold {'book': 1} when no copy is available
+holds/id/cancel/ - cancel a hold; a copy reserved for it goes to the next in line
+borrow/ - borrow a book copy {'book_copy': 1} or any available copy of a book {'book': 1}
+borrow/bulk/ - check out many copies for one member {'user': 1, 'book_copies': [1, 2]} (librarian/admin)
 borrows/ - list all borrow records (librarian/admin)
+return/bulk/ - return many borrow records {'records': [1, 2]} (librarian/admin)
 return/id/ - return a book copy
-my-borrows/ - list user's borrow records
+my-borrows/ - list user's borrow records (paginated, BorrowRecordFilter incl. borrowed_after/borrowed_before)
 mark-fee-paid/id/ - mark late fee as paid (librarian/admin)
+export/books|copies|borrows/?output=csv|ndjson - stream an export, accepts the matching filters (librarian/admin)
+
+Any list endpoint accepts ?cursor= (empty on the first page) to switch to keyset pagination.
 """
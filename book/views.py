@@ -1,10 +1,31 @@
+import asyncio
+
 from rest_framework.response import Response
-from .models import Book, BookCopy, BorrowRecord
-from .serializers import BookModelSerializer, BookListModelSerializer, BookCopyModelSerializer, BorrowRecordModelSerializer
+from .models import Book, BookCopy, BookQuerySet, BorrowRecord, Hold, LateFeeEntry
+from user.models import User
+from .serializers import (
+    BookModelSerializer,
+    BookListModelSerializer,
+    BookCopyModelSerializer,
+    BorrowRecordModelSerializer,
+    BulkCheckoutSerializer,
+    BulkReturnSerializer,
+    BookCopyProvisionSerializer,
+    BookAvailabilityQuerySerializer,
+    HoldModelSerializer
+    )
 from rest_framework.views import APIView
-from rest_framework import viewsets
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework import mixins, viewsets
 from rest_framework.decorators import action
 from django.utils import timezone
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
 from rest_framework import permissions, status
 from django_filters import rest_framework as filters
 from rest_framework import filters as drf_filters
@@ -18,7 +39,15 @@ from .permissions import (
     CanManageBorrow
     )
 from .paginators import CustomPageNumberPagination
-from .filters import BookFilter, BookCopyFilter
+from .cache import cached_response
+from .conditional import ConditionalGetMixin
+from .suggest import suggestion_index
+from .facets import facet_counts
+from .events import SlotStream, get_broker, sse_message, stream_slots
+from .signals import copy_deletes_counted_by_caller
+from .throttles import SuggestRateThrottle
+from .exports import DATASETS, CONTENT_TYPES, filtered_queryset, export_lines
+from .filters import BookFilter, BookCopyFilter, BookSearchFilter, BorrowRecordFilter, HoldFilter
 
 
 class HealthCheckAPIView(APIView):
@@ -26,13 +55,13 @@ class HealthCheckAPIView(APIView):
         return Response({'status': 'ok'})
     
 
-class BookViewSet(viewsets.ModelViewSet):
+class BookViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Book.objects.all()
     serializer_class = BookModelSerializer
     permission_classes = [permissions.IsAuthenticated, CanManageBooks]
     pagination_class = CustomPageNumberPagination
-    filter_backends = [filters.DjangoFilterBackend, drf_filters.SearchFilter, drf_filters.OrderingFilter]
-    search_fields = ['title', 'topics', 'author']
+    filter_backends = [filters.DjangoFilterBackend, drf_filters.OrderingFilter, BookSearchFilter]
+    search_fields = ['title_normalized', 'topics_normalized', 'author_normalized']
     ordering_fields = ['publication_year', 'title', 'total_copies']
     ordering = ['-publication_year']
     filterset_class = BookFilter
@@ -43,25 +72,144 @@ class BookViewSet(viewsets.ModelViewSet):
         return BookModelSerializer
     
     def get_queryset(self):
+        if self.action == 'list' and self.include_availability():
+            return self.queryset.with_copy_counts()
         return self.queryset
 
+    def include_availability(self):
+        return 'availability' in self.request.query_params.get('include', '').split(',')
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['include_availability'] = self.action == 'list' and self.include_availability()
+        return context
+
     def get_permissions(self):
-        if self.action in ['list', 'retrieve', 'available_copies']:
+        if self.action in ['list', 'retrieve', 'available_copies', 'suggest', 'facets', 'availability']:
             permission_classes = [permissions.AllowAny]
+        elif self.action == 'provision_copies':
+            permission_classes = [permissions.IsAuthenticated, CanManageBookCopies]
         else:
             permission_classes = [permissions.IsAuthenticated, IsAdminOrReadOnly]
         return [perm() for perm in permission_classes]
 
+    @cached_response('list')
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cached_response('retrieve')
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     @action(detail=True, methods=['get'], url_path='available_copies',
             permission_classes=[permissions.AllowAny])
+    @cached_response('available_copies')
     def available_copies(self, request, pk=None):
         book = self.get_object()
-        return Response({'available_copies': book.available_copies()})
+        return self.conditional_detail_response(
+            request, book, lambda: Response({'available_copies': book.available_copies()})
+        )
+
+    @action(detail=False, methods=['get'], url_path='suggest',
+            throttle_classes=[SuggestRateThrottle])
+    def suggest(self, request):
+        return Response({'results': suggestion_index.suggest(request.query_params.get('q', ''))})
+
+    @action(detail=False, methods=['get'], url_path='availability')
+    @cached_response('availability')
+    def availability(self, request):
+        """Per-status copy counts for up to 500 books from one grouped query."""
+        query = BookAvailabilityQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        ids = query.validated_data['ids']
 
+        results = [
+            {'id': row['id'], **{name: row[field] for name, field in BookQuerySet.COPY_COUNT_FIELDS.items()}}
+            for row in Book.objects.filter(pk__in=ids).copy_counts().order_by('id')
+        ]
+        found = {row['id'] for row in results}
+        return Response({'results': results, 'missing': [pk for pk in ids if pk not in found]})
 
-class BookCopyViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['get'], url_path='facets')
+    @cached_response('facets')
+    def facets(self, request):
+        """Counts per topic, language and decade for the books matching the current filters."""
+        return Response(facet_counts(self.filter_queryset(self.get_queryset())))
+
+    @action(detail=True, methods=['post'], url_path='copies')
+    def provision_copies(self, request, pk=None):
+        """
+        Add, remove or re-status `count` copies of the book with bulk SQL.
+        total_copies and available_count change in the same transaction, and
+        the request is all-or-nothing: if fewer than `count` copies qualify,
+        nothing changes and 409 is returned.
+        """
+        serializer = BookCopyProvisionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        operation = serializer.validated_data['operation']
+        count = serializer.validated_data['count']
+        copy_status = serializer.validated_data['status']
+        available = BookCopy.Status.AVAILABLE
+
+        with transaction.atomic():
+            # Locking the book serialises provisioning of the same title.
+            book = self.get_object()
+            Book.objects.select_for_update().filter(pk=book.pk).exists()
+
+            if operation == 'add':
+                BookCopy.objects.bulk_create(BookCopy(book=book, status=copy_status) for _ in range(count))
+                Book.adjust_available_count(book.pk, count if copy_status == available else 0, total_delta=count)
+                Hold.fill_queue(book)
+            else:
+                # Copies with loan history are protected by BorrowRecord and cannot be removed.
+                # NOT EXISTS rather than borrow_records__isnull, whose LEFT JOIN cannot be locked FOR UPDATE.
+                candidates = book.copies.filter(status=copy_status)
+                never_borrowed = ~Exists(BorrowRecord.objects.filter(book_copy=OuterRef('pk')))
+                if operation == 'remove':
+                    candidates = candidates.filter(never_borrowed)
+                ids = list(candidates.order_by('-id').values_list('id', flat=True)[:count])
+                if len(ids) < count:
+                    return Response(
+                        {'message': f'Only {len(ids)} matching copies of this book, {count} requested'},
+                        status=status.HTTP_409_CONFLICT,
+                    )
+
+                if operation == 'remove':
+                    removable = BookCopy.objects.select_for_update(of=('self',)).filter(
+                        never_borrowed, pk__in=ids, status=copy_status
+                    )
+                    locked = list(removable.values_list('id', flat=True))
+                    if len(locked) < count:
+                        transaction.set_rollback(True)
+                        return Response({'message': 'Copies changed concurrently, try again'},
+                                        status=status.HTTP_409_CONFLICT)
+                    # One DELETE, with closed holds still pointing at these copies set to NULL in
+                    # one UPDATE; the per-copy counter receiver is skipped for a single adjustment.
+                    with copy_deletes_counted_by_caller():
+                        BookCopy.objects.filter(pk__in=locked).delete()
+                    Book.adjust_available_count(book.pk, -count if copy_status == available else 0, total_delta=-count)
+                else:
+                    moved = BookCopy.bulk_transition(ids, copy_status, serializer.validated_data['to_status'])
+                    if len(moved) < count:
+                        transaction.set_rollback(True)
+                        return Response({'message': 'Copies changed concurrently, try again'},
+                                        status=status.HTTP_409_CONFLICT)
+                    Hold.fill_queue(book)
+
+        book.refresh_from_db(fields=['total_copies', 'available_count'])
+        return Response({
+            'message': f'{operation} applied to {count} copies',
+            'total_copies': book.total_copies,
+            'available_count': book.available_count,
+        })
+
+
+class BookCopyViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = BookCopy.objects.all()
     serializer_class = BookCopyModelSerializer
+    pagination_class = CustomPageNumberPagination
+    # Copies are listed with their book's title.
+    collection_stamp_fields = ('updated_at', 'book__updated_at')
     filter_backends = [filters.DjangoFilterBackend, drf_filters.OrderingFilter]
     filterset_class = BookCopyFilter
     ordering_fields = ['status', 'book__title']
@@ -75,8 +223,47 @@ class BookCopyViewSet(viewsets.ModelViewSet):
         return [perm() for perm in permission_classes]
     
 
+
+class HoldViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    serializer_class = HoldModelSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CustomPageNumberPagination
+    filter_backends = [filters.DjangoFilterBackend]
+    filterset_class = HoldFilter
+
+    def get_queryset(self):
+        holds = Hold.objects.select_related('book').with_queue_position().order_by('-created_at', '-id')
+        if self.request.user.role not in ['librarian', 'admin']:
+            holds = holds.filter(user_id=self.request.user.id)
+        return holds
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            with transaction.atomic():
+                hold = serializer.save(user_id=request.user.id)
+        except IntegrityError:
+            return Response({'message': 'You already have an active hold on this book'}, status=status.HTTP_409_CONFLICT)
+        hold = self.get_queryset().get(pk=hold.pk)
+        return Response(self.get_serializer(hold).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        with transaction.atomic():
+            hold = self.get_object()
+            # of=('self',): FOR UPDATE cannot lock the nullable side of the book_copy outer join.
+            hold = Hold.objects.select_for_update(of=('self',)).select_related('book_copy').get(pk=hold.pk)
+            if hold.status not in Hold.ACTIVE_STATUSES:
+                return Response({'message': f'Hold is already {hold.status}'}, status=status.HTTP_409_CONFLICT)
+            hold.close(Hold.Status.CANCELLED)
+        return Response({'message': 'Hold cancelled'}, status=status.HTTP_200_OK)
+
+
 class BorrowRecordAPIView(APIView):
     serializer_class = BorrowRecordModelSerializer
+    pagination_class = CustomPageNumberPagination
+    filterset_class = BorrowRecordFilter
     
     def get_permissions(self):
         if self.request.method == 'PATCH':
@@ -92,52 +279,170 @@ class BorrowRecordAPIView(APIView):
 
     def borrow_book(self, request):
         serializer = BorrowRecordModelSerializer(data=request.data, context={'request': request})
-        serializer.is_valid(raise_exception=True)
 
-        borrow_record = serializer.save(user=request.user)
+        with transaction.atomic():
+            # Lock the member row so concurrent borrows cannot both pass the borrow limit check.
+            User.objects.select_for_update().filter(pk=request.user.pk).exists()
+            serializer.is_valid(raise_exception=True)
+
+            book = serializer.validated_data.pop('book', None)
+            book_copy = serializer.validated_data.get('book_copy')
+            # A member whose hold is ready borrows the copy reserved for them.
+            # of=('self',) as book_copy is nullable; the copy is moved by a conditional UPDATE anyway.
+            hold = Hold.objects.select_for_update(of=('self',)).select_related('book_copy').filter(
+                user_id=request.user.id, status=Hold.Status.READY, book_id=book.pk if book else book_copy.book_id
+            ).first()
+            if hold is not None and (book is not None or hold.book_copy_id == book_copy.pk):
+                book_copy = hold.fulfil()
+                if book_copy is None:
+                    return Response({'message': 'Reserved copy is no longer available'}, status=status.HTTP_409_CONFLICT)
+            elif book is not None:
+                book_copy = book.claim_available_copy()
+                if book_copy is None:
+                    return Response({'message': 'No available copies of this book'}, status=status.HTTP_409_CONFLICT)
+            else:
+                if not book_copy.transition(BookCopy.Status.AVAILABLE, BookCopy.Status.BORROWED):
+                    return Response({'message': 'Book copy is no longer available'}, status=status.HTTP_409_CONFLICT)
+
+            borrow_record = serializer.save(user_id=request.user.id, book_copy=book_copy)
 
         response_data = BorrowRecordModelSerializer(borrow_record, context={'request': request}).data
         return Response({'message': 'Book borrowed successfully', 'record': response_data}, status=status.HTTP_201_CREATED)
 
     def return_book(self, request, id=None):
-        try:
-            borrow_record = BorrowRecord.objects.get(id=id)
-        except BorrowRecord.DoesNotExist:
-            return Response({'message': 'Borrow record not found'}, status=status.HTTP_404_NOT_FOUND)
-        now = timezone.now()
-        
-        if request.user.role in ['librarian', 'admin']:
-            pass
-        elif borrow_record.user != request.user:
-            return Response({'message': 'You can only return your own books'}, status=status.HTTP_403_FORBIDDEN)
+        with transaction.atomic():
+            # The row lock makes the fee read below the one the ledger entry is based on.
+            try:
+                borrow_record = BorrowRecord.objects.select_for_update(of=('self',)).select_related('book_copy').get(id=id)
+            except BorrowRecord.DoesNotExist:
+                return Response({'message': 'Borrow record not found'}, status=status.HTTP_404_NOT_FOUND)
 
-        
-        borrow_record.return_date = now
-        borrow_record.late_fee = borrow_record.calculated_late_fee()
+            if request.user.role in ['librarian', 'admin']:
+                pass
+            elif borrow_record.user_id != request.user.id:
+                return Response({'message': 'You can only return your own books'}, status=status.HTTP_403_FORBIDDEN)
+            if borrow_record.return_date is not None:
+                return Response({'message': 'Book already returned'}, status=status.HTTP_409_CONFLICT)
 
-        borrow_record.book_copy.status = BookCopy.Status.AVAILABLE
-        borrow_record.book_copy.save(update_fields=['status'])
+            previous_fee = borrow_record.late_fee
+            borrow_record.return_date = timezone.now()
+            borrow_record.late_fee = borrow_record.calculated_late_fee()
+            borrow_record.save(update_fields=['return_date', 'late_fee'])
+
+            # The freed copy goes to the head of the hold queue, if any.
+            Hold.allocate(borrow_record.book_copy, BookCopy.Status.BORROWED)
+            LateFeeEntry.objects.bulk_create(LateFeeEntry.for_changes(
+                [(borrow_record.id, previous_fee, borrow_record.late_fee)], LateFeeEntry.Reason.RETURN
+            ))
 
-        borrow_record.save(update_fields=['return_date', 'late_fee'])
         response_data = BorrowRecordModelSerializer(borrow_record, context={'request': request}).data
         return Response({'message': 'Book returned successfully', 'record': response_data}, status=status.HTTP_200_OK)
     
 
     def get(self, request):
-        if request.user.role in ['librarian', 'admin']:
-            borrows = BorrowRecord.objects.all()
-        else:
-            borrows = BorrowRecord.objects.filter(user=request.user)
-        return Response(BorrowRecordModelSerializer(borrows, many=True).data)
+        borrows = BorrowRecord.objects.select_related('user', 'book_copy__book').with_accrued_fee().order_by('-borrow_date')
+        if request.user.role not in ['librarian', 'admin']:
+            borrows = borrows.filter(user_id=request.user.id)
+        borrows = filters.DjangoFilterBackend().filter_queryset(request, borrows, self)
+
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(borrows, request, view=self)
+        serializer = BorrowRecordModelSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
     
 
+class BulkCheckoutAPIView(APIView):
+    permission_classes = [permissions.IsAuthenticated, IsLibrarianOrAdmin]
+
+    def post(self, request):
+        serializer = BulkCheckoutSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        member = serializer.validated_data['user']
+        copy_ids = list(dict.fromkeys(serializer.validated_data['book_copies']))
+        now = timezone.now()
+
+        with transaction.atomic():
+            User.objects.select_for_update().filter(pk=member.pk).exists()
+            active_borrows = BorrowRecord.objects.filter(user=member, return_date__isnull=True).count()
+            remaining = max(member.borrow_limit - active_borrows, 0)
+
+            available = set(
+                BookCopy.objects.select_for_update()
+                .filter(pk__in=copy_ids, status=BookCopy.Status.AVAILABLE)
+                .values_list('id', flat=True)
+            )
+            accepted = [pk for pk in copy_ids if pk in available][:remaining]
+            claimed = BookCopy.bulk_transition(accepted, BookCopy.Status.AVAILABLE, BookCopy.Status.BORROWED)
+
+            records = BorrowRecord.objects.bulk_create([
+                BorrowRecord(user=member, book_copy_id=pk, borrow_date=now, due_date=now + BorrowRecord.LOAN_PERIOD)
+                for pk in accepted if pk in claimed
+            ])
+
+        record_ids = {record.book_copy_id: record.id for record in records}
+        results = []
+        for pk in copy_ids:
+            if pk in record_ids:
+                results.append({'book_copy': pk, 'status': 'borrowed', 'record': record_ids[pk]})
+            elif pk in available:
+                results.append({'book_copy': pk, 'status': 'borrow_limit_reached'})
+            else:
+                results.append({'book_copy': pk, 'status': 'not_available'})
+        return Response({'message': f'{len(records)} book(s) borrowed', 'results': results}, status=status.HTTP_200_OK)
+
+
+class BulkReturnAPIView(APIView):
+    permission_classes = [permissions.IsAuthenticated, IsLibrarianOrAdmin]
+
+    def post(self, request):
+        serializer = BulkReturnSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        record_ids = list(dict.fromkeys(serializer.validated_data['records']))
+        now = timezone.now()
+
+        with transaction.atomic():
+            records = list(BorrowRecord.objects.select_for_update().filter(id__in=record_ids, return_date__isnull=True))
+            fee_changes = []
+            for record in records:
+                previous_fee = record.late_fee
+                record.return_date = now
+                record.late_fee = record.calculated_late_fee()
+                fee_changes.append((record.id, previous_fee, record.late_fee))
+            BorrowRecord.objects.bulk_update(records, ['return_date', 'late_fee'])
+            LateFeeEntry.objects.bulk_create(LateFeeEntry.for_changes(fee_changes, LateFeeEntry.Reason.RETURN))
+            copies = list(BookCopy.objects.filter(pk__in=[record.book_copy_id for record in records]))
+            queued_books = set(
+                Hold.objects.filter(book__in={copy.book_id for copy in copies}, status=Hold.Status.WAITING)
+                .values_list('book_id', flat=True)
+            )
+            BookCopy.bulk_transition(
+                [copy.pk for copy in copies if copy.book_id not in queued_books],
+                BookCopy.Status.BORROWED, BookCopy.Status.AVAILABLE,
+            )
+            for book_copy in copies:
+                if book_copy.book_id in queued_books:
+                    Hold.allocate(book_copy, BookCopy.Status.BORROWED)
+
+        returned = {record.id: record for record in records}
+        existing = set(BorrowRecord.objects.filter(id__in=record_ids).values_list('id', flat=True))
+        results = []
+        for pk in record_ids:
+            if pk in returned:
+                results.append({'record': pk, 'status': 'returned', 'late_fee': str(returned[pk].late_fee)})
+            elif pk in existing:
+                results.append({'record': pk, 'status': 'already_returned'})
+            else:
+                results.append({'record': pk, 'status': 'not_found'})
+        return Response({'message': f'{len(records)} book(s) returned', 'results': results}, status=status.HTTP_200_OK)
+
+
 class BorrowListAPIView(APIView):
     serializer_class = BorrowRecordModelSerializer
     permission_classes = [permissions.IsAuthenticated, IsLibrarianOrAdmin]
     pagination_class = CustomPageNumberPagination
 
     def get_queryset(self):
-        queryset = BorrowRecord.objects.all()
+        queryset = BorrowRecord.objects.select_related('user', 'book_copy__book').with_accrued_fee().order_by('-borrow_date')
         status_filter = self.request.query_params.get('status')
 
         if status_filter == 'overdue':
@@ -149,11 +454,98 @@ class BorrowListAPIView(APIView):
     def get(self, request):
         queryset = self.get_queryset()
         paginator = self.pagination_class()
-        page = paginator.paginate_queryset(queryset, request)
+        page = paginator.paginate_queryset(queryset, request, view=self)
         serializer = self.serializer_class(page, many=True)
         return paginator.get_paginated_response(serializer.data)
 
 
+STREAM_HEARTBEAT_SECONDS = 15
+
+
+def stream_user(request):
+    """The user DRF's authentication classes find on `request`, or None for bad credentials."""
+    drf_request = Request(request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+    try:
+        return drf_request.user
+    except APIException:
+        return None
+
+
+async def availability_stream(request):
+    """
+    Server-sent events with the available_count of up to 500 books
+    (?ids=1,2,3): a 'snapshot' event first, then an 'availability' event
+    whenever a borrow, return or copy change commits. Replaces polling
+    available_copies.
+
+    ASGI only (e.g. uvicorn config.asgi:application): under WSGI every open
+    stream would pin a worker, so it answers 501 there. Requires an
+    authenticated user, who may hold AVAILABILITY_STREAM_MAX_PER_CLIENT
+    streams per process at once; further ones get 429.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'message': 'The availability stream is only served over ASGI'},
+                            status=status.HTTP_501_NOT_IMPLEMENTED)
+    user = await sync_to_async(stream_user)(request)
+    if user is None or not user.is_authenticated:
+        return JsonResponse({'message': 'Authentication credentials were not provided or are invalid'},
+                            status=status.HTTP_401_UNAUTHORIZED)
+
+    query = BookAvailabilityQuerySerializer(data=request.GET)
+    if not query.is_valid():
+        return JsonResponse(query.errors, status=status.HTTP_400_BAD_REQUEST)
+    ids = query.validated_data['ids']
+
+    client = f'user:{user.pk}'
+    if not stream_slots.acquire(client):
+        return JsonResponse({'message': 'Too many open availability streams'}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+
+    async def events():
+        # Subscribe before reading the snapshot so no change can fall in between.
+        subscription = get_broker().subscribe(ids)
+        try:
+            snapshot = await sync_to_async(list)(
+                Book.objects.filter(pk__in=ids).values('id', 'available_count').order_by('id')
+            )
+            yield sse_message([{'book': row['id'], 'available_count': row['available_count']} for row in snapshot],
+                              event='snapshot')
+            while True:
+                try:
+                    event = await subscription.get(timeout=STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+                    continue
+                yield sse_message(event, event='availability')
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(SlotStream(events(), client), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+class ExportAPIView(APIView):
+    permission_classes = [permissions.IsAuthenticated, IsLibrarianOrAdmin]
+
+    def get(self, request, dataset):
+        if dataset not in DATASETS:
+            return Response({'message': f'Unknown export {dataset}'}, status=status.HTTP_404_NOT_FOUND)
+
+        output = request.query_params.get('output', 'csv')
+        if output not in CONTENT_TYPES:
+            return Response({'message': 'output must be csv or ndjson'}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset, errors = filtered_queryset(dataset, request.query_params, request=request)
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        extension = 'csv' if output == 'csv' else 'ndjson'
+        response = StreamingHttpResponse(export_lines(dataset, queryset, output), content_type=CONTENT_TYPES[output])
+        response['Content-Disposition'] = f'attachment; filename="{dataset}.{extension}"'
+        return response
+
+
 class MarkFeePaidAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated, IsLibrarianOrAdmin]
 
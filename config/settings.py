@@ -124,7 +124,7 @@ REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'user.authentication.ClaimsJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -137,8 +137,9 @@ REST_FRAMEWORK = {
     'DEFAULT_THROTTLE_RATES': {
         'user': '100/hour',
         'anon': '20/hour',
+        'suggest': '120/minute',
     },
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'book.paginators.CustomPageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -157,9 +158,56 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=30),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
-    'UPDATE_LAST_LOGIN': True,
+    # LoginView records last_login through user.logins.last_login_buffer instead.
+    'UPDATE_LAST_LOGIN': False,
+    'TOKEN_REFRESH_SERIALIZER': 'user.authentication.ClaimsTokenRefreshSerializer',
 }
 
+# Cache holding the 'claims changed' markers that revoke role claims in live access tokens and
+# the markers of freshly blacklisted refresh tokens. Use a backend shared by all workers
+# (e.g. Redis or memcached) when running more than one process.
+AUTH_CACHE_ALIAS = env('AUTH_CACHE_ALIAS', default='default')
+
+# In-process Bloom filter in front of the refresh-token blacklist (user/blacklist.py): seconds
+# between pulls of newly blacklisted tokens, and before a full rebuild that drops expired ones.
+TOKEN_BLACKLIST_FILTER = env.bool('TOKEN_BLACKLIST_FILTER', default=True)
+TOKEN_BLACKLIST_FILTER_SYNC = env.int('TOKEN_BLACKLIST_FILTER_SYNC', default=5)
+TOKEN_BLACKLIST_FILTER_MAX_AGE = env.int('TOKEN_BLACKLIST_FILTER_MAX_AGE', default=3600)
+
+# Buffered last_login writes (user/logins.py): logins within LAST_LOGIN_GRANULARITY seconds of the
+# stored value are not written; the rest are flushed as one bulk UPDATE per interval or full buffer.
+LAST_LOGIN_GRANULARITY = env.int('LAST_LOGIN_GRANULARITY', default=300)
+LAST_LOGIN_FLUSH_INTERVAL = env.int('LAST_LOGIN_FLUSH_INTERVAL', default=10)
+LAST_LOGIN_BUFFER_SIZE = env.int('LAST_LOGIN_BUFFER_SIZE', default=500)
+
+# Response cache for the public catalog endpoints (see book/cache.py). Works with
+# LocMemCache (LRU culling at MAX_ENTRIES) or FileBasedCache, no external service needed.
+# LocMemCache is per process: invalidation from import_catalog or repair_available_counts
+# does not reach the web workers, which keep stale entries for up to CATALOG_CACHE_TIMEOUT.
+# Use a shared CATALOG_CACHE_BACKEND when running those commands against a live site.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'catalog': {
+        'BACKEND': env('CATALOG_CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': env('CATALOG_CACHE_LOCATION', default='catalog'),
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+}
+CATALOG_CACHE_ALIAS = 'catalog'
+CATALOG_CACHE_TIMEOUT = 300
+
+# Seconds before a worker rebuilds its in-memory autocomplete index (book/suggest.py).
+SUGGEST_INDEX_MAX_AGE = env.int('SUGGEST_INDEX_MAX_AGE', default=300)
+
+# Fan-out for books/availability/stream/ (book/events.py). The in-process broker only
+# reaches subscribers of the same worker; point this at a pub/sub backed broker to span workers.
+AVAILABILITY_BROKER = env('AVAILABILITY_BROKER', default='book.events.InProcessBroker')
+# Concurrent availability streams one user may keep open per ASGI worker; more get 429.
+AVAILABILITY_STREAM_MAX_PER_CLIENT = env.int('AVAILABILITY_STREAM_MAX_PER_CLIENT', default=3)
+
 # Dev email backend; replace with SMTP in production
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import User, Profile, OneTimeCode
+from .models import User, Profile, OneTimeCode, OutboxEmail
 from django.contrib.auth.admin import UserAdmin as DjangoUserAdmin
 
 
@@ -28,3 +28,11 @@ class OneTimeCodeAdmin(admin.ModelAdmin):
     list_display = ('user', 'purpose', 'code', 'is_used', 'expires_at', 'created_at')
     list_filter = ('purpose', 'is_used')
     search_fields = ('user__username', 'user__email', 'code')
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'recipients', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'created_at')
+    list_filter = ('status',)
+    search_fields = ('subject',)
+    readonly_fields = ('attempts', 'last_error', 'sent_at', 'created_at')
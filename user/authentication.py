@@ -0,0 +1,137 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils.functional import cached_property
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from .blacklist import may_be_blacklisted, remember
+from .utils import auth_cache
+
+
+CLAIMS_AT = 'claims_at'
+CLAIMS_CHANGED_KEY = 'auth:claims-changed:{}'
+
+
+def stamp_claims(token, user):
+    for field, value in user.token_claims().items():
+        token[field] = value
+    token[CLAIMS_AT] = time.time()
+
+
+def revoke_claims(user_id):
+    """
+    Reject tokens whose claims were stamped before now, once the transaction
+    commits. The marker only has to outlive access tokens already issued, so
+    it expires after ACCESS_TOKEN_LIFETIME; refreshes re-stamp claims from the
+    database anyway.
+    """
+    def mark():
+        timeout = int(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()) + 1
+        auth_cache().set(CLAIMS_CHANGED_KEY.format(user_id), time.time(), timeout=timeout)
+
+    transaction.on_commit(mark)
+
+
+def claims_revoked(token):
+    changed_at = auth_cache().get(CLAIMS_CHANGED_KEY.format(token[api_settings.USER_ID_CLAIM]))
+    return changed_at is not None and token.get(CLAIMS_AT, 0) < changed_at
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """Refresh token (and derived access tokens) carrying the User.CLAIM_FIELDS of its user."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        stamp_claims(token, user)
+        return token
+
+    def check_blacklist(self):
+        if may_be_blacklisted(self.payload[api_settings.JTI_CLAIM]):
+            super().check_blacklist()
+
+    def blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        token, _ = OutstandingToken.objects.get_or_create(
+            jti=jti, defaults={'token': str(self), 'expires_at': datetime_from_epoch(self.payload['exp'])}
+        )
+        # One INSERT instead of get_or_create's SELECT, savepoint and INSERT.
+        BlacklistedToken.objects.bulk_create([BlacklistedToken(token=token)], ignore_conflicts=True)
+        remember(jti)
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh that re-reads the user, so new tokens carry the current role and
+    limit and a deactivated account cannot mint access tokens. One primary-key
+    query per refresh instead of one per request.
+    """
+    token_class = ClaimsRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user = get_user_model().objects.filter(pk=refresh[api_settings.USER_ID_CLAIM], is_active=True).first()
+        if user is None:
+            raise AuthenticationFailed('User is inactive or no longer exists.', code='user_inactive')
+        stamp_claims(refresh, user)
+
+        data = {'access': str(refresh.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+        return data
+
+
+class ClaimsUser(TokenUser):
+    """
+    request.user backed by the token alone. `role` and `borrow_limit` resolve
+    to claims through TokenUser.__getattr__; use db_user() where the model
+    instance itself is needed.
+    """
+
+    @cached_property
+    def is_active(self):
+        return bool(self.token.get('is_active'))
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication without the per-request user query. Tokens issued
+    before role claims existed fall back to loading the user.
+    """
+
+    def get_user(self, validated_token):
+        if 'role' not in validated_token:
+            return super().get_user(validated_token)
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken('Token contained no recognizable user identification')
+        if not validated_token.get('is_active'):
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        if claims_revoked(validated_token):
+            raise AuthenticationFailed('Account details changed, refresh the token.', code='token_claims_stale')
+        return ClaimsUser(validated_token)
+
+
+class ClaimsJWTScheme(SimpleJWTScheme):
+    target_class = 'user.authentication.ClaimsJWTAuthentication'
+
+
+def db_user(user):
+    """The User row behind request.user, loading it only for token-backed users."""
+    if isinstance(user, ClaimsUser):
+        return get_user_model().objects.select_related('profile').get(pk=user.pk)
+    return user
@@ -0,0 +1,148 @@
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from .utils import auth_cache
+
+
+FALSE_POSITIVE_RATE = 0.01
+MIN_CAPACITY = 100_000
+# Rows below the watermark re-read on every sync, for inserts that committed after a higher id.
+SYNC_OVERLAP = 1000
+BLACKLISTED_KEY = 'auth:blacklisted:{}'
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter of strings; ~1.2 MB per million entries at a 1% false positive rate."""
+
+    def __init__(self, capacity, error_rate=FALSE_POSITIVE_RATE):
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        step = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * step) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        added = False
+        for position in self._positions(item):
+            mask = 1 << (position & 7)
+            if not self.bits[position >> 3] & mask:
+                self.bits[position >> 3] |= mask
+                added = True
+        # Re-adding a known item leaves count alone, so it tracks distinct items closely enough to size on.
+        self.count += added
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class BlacklistFilter:
+    """
+    Bloom filter of the JTIs in the unexpired refresh-token blacklist, so a
+    refresh with a valid token skips the blacklist query; a hit, true or
+    false positive, is confirmed against the table.
+
+    Built in a background thread, with refreshes checking the table until it
+    is ready. Extended with rows above the last seen id every
+    TOKEN_BLACKLIST_FILTER_SYNC seconds and rebuilt after
+    TOKEN_BLACKLIST_FILTER_MAX_AGE seconds, or when it fills up, to drop
+    expired tokens. Tokens blacklisted by other workers since the last sync
+    are caught by the marker remember() leaves in the auth cache.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._watermark = 0
+        self._built_at = 0.0
+        self._synced_at = 0.0
+        self._building = False
+
+    def _refresh(self):
+        now = time.monotonic()
+        if self._bloom is not None and now - self._synced_at < getattr(settings, 'TOKEN_BLACKLIST_FILTER_SYNC', 5):
+            return
+        with self._lock:
+            if self._bloom is not None and now - self._synced_at < getattr(settings, 'TOKEN_BLACKLIST_FILTER_SYNC', 5):
+                return
+            if not self._building and (
+                self._bloom is None
+                or self._bloom.count >= self._bloom.capacity
+                or now - self._built_at >= getattr(settings, 'TOKEN_BLACKLIST_FILTER_MAX_AGE', 3600)
+            ):
+                self._building = True
+                threading.Thread(target=self._build_in_background, daemon=True).start()
+            if self._bloom is not None:
+                self._sync()
+                self._synced_at = now
+
+    def _build_in_background(self):
+        try:
+            self.build()
+        finally:
+            self._building = False
+            connections.close_all()
+
+    def build(self):
+        """Load the unexpired blacklist into a fresh filter and swap it in."""
+        rows = BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now())
+        bloom = BloomFilter(max(MIN_CAPACITY, 2 * rows.count()))
+        watermark = self._load(bloom, rows, 0)
+        with self._lock:
+            self._bloom, self._watermark = bloom, watermark
+            # Picks up tokens blacklisted while the snapshot was being read.
+            self._sync()
+            self._built_at = self._synced_at = time.monotonic()
+
+    def _sync(self):
+        rows = BlacklistedToken.objects.filter(id__gt=self._watermark - SYNC_OVERLAP)
+        self._watermark = self._load(self._bloom, rows, self._watermark)
+
+    def _load(self, bloom, rows, watermark):
+        for pk, jti in rows.order_by('id').values_list('id', 'token__jti').iterator(chunk_size=10000):
+            bloom.add(jti)
+            watermark = max(watermark, pk)
+        return watermark
+
+    def might_contain(self, jti):
+        self._refresh()
+        bloom = self._bloom
+        return bloom is None or jti in bloom
+
+    def add(self, jti):
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti)
+
+    def clear(self):
+        with self._lock:
+            self._bloom, self._watermark = None, 0
+
+
+blacklist_filter = BlacklistFilter()
+
+
+def may_be_blacklisted(jti):
+    """False only when `jti` is certainly not in the blacklist table."""
+    if not getattr(settings, 'TOKEN_BLACKLIST_FILTER', True):
+        return True
+    return auth_cache().get(BLACKLISTED_KEY.format(jti)) is not None or blacklist_filter.might_contain(jti)
+
+
+def remember(jti):
+    """Record a token just blacklisted by this worker, for this worker and, through the cache, the others."""
+    blacklist_filter.add(jti)
+    timeout = 2 * getattr(settings, 'TOKEN_BLACKLIST_FILTER_SYNC', 5) + 60
+    auth_cache().set(BLACKLISTED_KEY.format(jti), True, timeout=timeout)
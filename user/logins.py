@@ -0,0 +1,90 @@
+import atexit
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.db.models import Case, DateTimeField, Q, Value, When
+from django.utils import timezone
+
+
+class LastLoginBuffer:
+    """
+    Collects last_login timestamps in process and writes them with one bulk
+    UPDATE every LAST_LOGIN_FLUSH_INTERVAL seconds, or as soon as
+    LAST_LOGIN_BUFFER_SIZE users are waiting. The UPDATE only moves
+    last_login forward, so a stale buffer cannot undo a newer login. A login is not recorded at all
+    when the stored value is already within LAST_LOGIN_GRANULARITY seconds.
+    Pending timestamps are flushed on interpreter exit; a hard kill loses at
+    most one interval.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._timer = None
+
+    def record(self, user, when=None):
+        """Queue `user`'s login. Returns False when the stored value is recent enough to keep."""
+        when = when or timezone.now()
+        granularity = timedelta(seconds=getattr(settings, 'LAST_LOGIN_GRANULARITY', 300))
+        if user.last_login is not None and when - user.last_login < granularity:
+            return False
+        user.last_login = when
+
+        with self._lock:
+            self._pending[user.pk] = when
+            full = len(self._pending) >= getattr(settings, 'LAST_LOGIN_BUFFER_SIZE', 500)
+            if not full:
+                self._schedule()
+        if full:
+            self.flush()
+        return True
+
+    def flush(self):
+        """Write pending timestamps; returns how many users were updated."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not pending:
+            return 0
+
+        User = get_user_model()
+        items = list(pending.items())
+        updated = 0
+        try:
+            for start in range(0, len(items), 500):
+                batch = items[start:start + 500]
+                login_at = Case(*[When(pk=pk, then=Value(when)) for pk, when in batch], output_field=DateTimeField())
+                # Rows another worker already moved past our value are left alone.
+                updated += User.objects.filter(pk__in=[pk for pk, _ in batch]).filter(
+                    Q(last_login__isnull=True) | Q(last_login__lt=login_at)
+                ).update(last_login=login_at)
+        except Exception:
+            # Keep them for the next flush; newer logins recorded meanwhile win.
+            with self._lock:
+                for pk, when in pending.items():
+                    self._pending.setdefault(pk, when)
+                self._schedule()
+            raise
+        return updated
+
+    def _schedule(self):
+        # Called with the lock held.
+        if self._timer is None:
+            self._timer = threading.Timer(getattr(settings, 'LAST_LOGIN_FLUSH_INTERVAL', 10), self._flush_on_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_on_timer(self):
+        try:
+            self.flush()
+        finally:
+            connections.close_all()
+
+
+last_login_buffer = LastLoginBuffer()
+atexit.register(last_login_buffer.flush)
@@ -0,0 +1,101 @@
+import statistics
+import time
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from user.authentication import ClaimsRefreshToken, ClaimsTokenRefreshSerializer
+from user.blacklist import blacklist_filter
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure /auth/token/refresh/ latency with growing blacklist tables, checking the blacklist '
+        'in the table only and through the Bloom filter. Nothing is persisted.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000],
+                            help='Blacklisted tokens in the table for each round.')
+        parser.add_argument('--refreshes', type=int, default=200)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'{"blacklisted":>12} {"mode":>7} {"build":>9} {"check p50":>10} '
+            f'{"refresh p50":>12} {"refresh p99":>12} {"queries":>8}'
+        )
+        try:
+            with transaction.atomic():
+                user = get_user_model().objects.create(username=f'bench-{uuid.uuid4().hex[:8]}',
+                                                       email=f'bench-{uuid.uuid4().hex[:8]}@example.com')
+                created = 0
+                for size in sorted(options['sizes']):
+                    self._populate(created, size)
+                    created = size
+                    for mode in ('table', 'filter'):
+                        with override_settings(TOKEN_BLACKLIST_FILTER=mode == 'filter'):
+                            self._report(size, mode, *self._measure(user, mode, options['refreshes']))
+                raise Rollback
+        except Rollback:
+            pass
+        finally:
+            blacklist_filter.clear()
+
+    def _populate(self, start, stop):
+        expires_at = timezone.now() + timedelta(days=30)
+        for offset in range(start, stop, 5000):
+            outstanding = OutstandingToken.objects.bulk_create(
+                OutstandingToken(jti=uuid.uuid4().hex, token='', expires_at=expires_at)
+                for _ in range(min(5000, stop - offset))
+            )
+            BlacklistedToken.objects.bulk_create(BlacklistedToken(token=token) for token in outstanding)
+
+    def _measure(self, user, mode, refreshes):
+        blacklist_filter.clear()
+        started = time.perf_counter()
+        if mode == 'filter':
+            # What a worker's background thread does once, before the filter takes over.
+            blacklist_filter.build()
+        build = time.perf_counter() - started
+
+        checks, timings = [], []
+        self.queries = 0
+        for _ in range(refreshes):
+            raw = str(ClaimsRefreshToken.for_user(user))
+            started = time.perf_counter()
+            ClaimsRefreshToken(raw)
+            checks.append(time.perf_counter() - started)
+
+            with connection.execute_wrapper(self._count):
+                started = time.perf_counter()
+                self._refresh(raw)
+                timings.append(time.perf_counter() - started)
+        timings.sort()
+        return (
+            build, statistics.median(checks), statistics.median(timings),
+            timings[min(len(timings) - 1, int(len(timings) * 0.99))], self.queries / refreshes,
+        )
+
+    def _count(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+    def _refresh(self, raw):
+        serializer = ClaimsTokenRefreshSerializer(data={'refresh': raw})
+        serializer.is_valid(raise_exception=True)
+
+    def _report(self, size, mode, build, check, p50, p99, queries):
+        self.stdout.write(
+            f'{size:>12} {mode:>7} {build * 1000:>7.1f}ms {check * 1000:>8.3f}ms '
+            f'{p50 * 1000:>10.2f}ms {p99 * 1000:>10.2f}ms {queries:>8.1f}'
+        )
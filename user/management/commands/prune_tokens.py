@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete expired outstanding refresh tokens and their blacklist entries in bounded batches. '
+        'A chunked replacement for flushexpiredtokens; meant to run periodically (e.g. daily cron).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--pause', type=float, default=0.0, help='Seconds to sleep between batches.')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        pruned = blacklisted = 0
+        while True:
+            with transaction.atomic():
+                # expires_at has no index, but every token gets the same lifetime, so expired rows are
+                # the lowest ids and the primary key scan stops as soon as the batch is full.
+                batch = list(
+                    OutstandingToken.objects.filter(expires_at__lte=now).order_by('id')
+                    .values_list('id', flat=True)[:options['batch_size']]
+                )
+                if not batch:
+                    break
+                # Cascades to the batch's blacklist entries.
+                _, deleted = OutstandingToken.objects.filter(id__in=batch).delete()
+                blacklisted += deleted.get(BlacklistedToken._meta.label, 0)
+            pruned += len(batch)
+            if options['verbosity'] > 1:
+                self.stdout.write(f'Pruned {pruned} token(s) so far.')
+            if len(batch) < options['batch_size']:
+                break
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Pruned {pruned} expired outstanding token(s), {blacklisted} of them blacklisted.'
+        ))
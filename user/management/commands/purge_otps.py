@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from user.models import OneTimeCode
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete one-time codes that are expired or already used, in bounded batches so the table '
+        'is never locked for long. Meant to run periodically (e.g. daily cron).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--pause', type=float, default=0.0, help='Seconds to sleep between batches.')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        # Both branches are ranges on otp_expiry_idx: anything past expiry, plus the few codes
+        # redeemed or superseded within their lifetime.
+        stale = Q(expires_at__lt=now) | Q(expires_at__gte=now, is_used=True)
+        deleted = 0
+        while True:
+            batch = list(
+                OneTimeCode.objects.filter(stale).order_by('expires_at').values_list('pk', flat=True)
+                [:options['batch_size']]
+            )
+            if not batch:
+                break
+            OneTimeCode.objects.filter(pk__in=batch).delete()
+            deleted += len(batch)
+            if options['verbosity'] > 1:
+                self.stdout.write(f'Deleted {deleted} code(s) so far.')
+            if len(batch) < options['batch_size']:
+                break
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        self.stdout.write(self.style.SUCCESS(f'Purged {deleted} one-time code(s).'))
@@ -0,0 +1,99 @@
+import time
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from user.models import OutboxEmail
+
+
+class Command(BaseCommand):
+    help = (
+        'Deliver queued OutboxEmail rows in batches over one reused mail connection, retrying '
+        'failures with exponential backoff. Run once from cron, or with --loop as a worker.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--max-attempts', type=int, default=5)
+        parser.add_argument('--backoff', type=int, default=30, help='Seconds before the first retry; doubles each time.')
+        parser.add_argument('--lease', type=int, default=300,
+                            help='Seconds a claimed batch stays hidden from other workers.')
+        parser.add_argument('--loop', action='store_true', help='Keep polling instead of exiting when the queue is empty.')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds between polls with --loop.')
+
+    def handle(self, *args, **options):
+        self.options = options
+        totals = {'sent': 0, 'retry': 0, 'failed': 0}
+        while True:
+            batch = self.claim()
+            if batch:
+                for outcome, count in self.deliver(batch).items():
+                    totals[outcome] += count
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Sent {totals['sent']} email(s), {totals['retry']} to retry, {totals['failed']} failed permanently."
+        ))
+
+    def claim(self):
+        """Lease a batch of due messages; a crashed worker's batch becomes due again after --lease."""
+        now = timezone.now()
+        with transaction.atomic():
+            batch = list(
+                OutboxEmail.objects.select_for_update(skip_locked=True)
+                .filter(status=OutboxEmail.Status.PENDING, next_attempt_at__lte=now)
+                .order_by('next_attempt_at', 'id')[:self.options['batch_size']]
+            )
+            OutboxEmail.objects.filter(pk__in=[message.pk for message in batch]).update(
+                next_attempt_at=now + timedelta(seconds=self.options['lease'])
+            )
+        return batch
+
+    def deliver(self, batch):
+        outcomes = {'sent': 0, 'retry': 0, 'failed': 0}
+        connection = get_connection()
+        try:
+            connection.open()
+        except Exception as exc:
+            for message in batch:
+                outcomes[self.record_failure(message, exc)] += 1
+            return outcomes
+
+        try:
+            for message in batch:
+                email = EmailMessage(
+                    subject=message.subject, body=message.body, from_email=message.from_email or None,
+                    to=message.recipients, connection=connection,
+                )
+                try:
+                    email.send()
+                except Exception as exc:
+                    outcomes[self.record_failure(message, exc)] += 1
+                else:
+                    OutboxEmail.objects.filter(pk=message.pk).update(
+                        status=OutboxEmail.Status.SENT, sent_at=timezone.now(),
+                        attempts=message.attempts + 1, last_error='',
+                    )
+                    outcomes['sent'] += 1
+        finally:
+            connection.close()
+        return outcomes
+
+    def record_failure(self, message, exc):
+        attempts = message.attempts + 1
+        if attempts >= self.options['max_attempts']:
+            status, outcome = OutboxEmail.Status.FAILED, 'failed'
+        else:
+            status, outcome = OutboxEmail.Status.PENDING, 'retry'
+        delay = timedelta(seconds=self.options['backoff'] * 2 ** (attempts - 1))
+        OutboxEmail.objects.filter(pk=message.pk).update(
+            status=status, attempts=attempts, next_attempt_at=timezone.now() + delay, last_error=repr(exc)[:2000],
+        )
+        self.stderr.write(f'Email {message.pk} attempt {attempts} failed: {exc}')
+        return outcome
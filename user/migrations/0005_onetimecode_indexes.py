@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-17 06:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0004_outboxemail'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='onetimecode',
+            index=models.Index(fields=['user', 'purpose', 'is_used', 'created_at'], name='otp_latest_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='onetimecode',
+            index=models.Index(fields=['expires_at'], name='otp_expiry_idx'),
+        ),
+    ]
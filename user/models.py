@@ -2,6 +2,8 @@ from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
 
+from .utils import generate_numeric_code, expiry
+
 
 class User(AbstractUser):
     class Role(models.TextChoices):
@@ -23,9 +25,21 @@ class User(AbstractUser):
 
     REQUIRED_FIELDS = ['email']
 
+    # Copied into JWTs at issue time so permission checks need no user query (see user/authentication.py).
+    CLAIM_FIELDS = ('role', 'borrow_limit', 'is_active')
+
     def __str__(self):
         return f'{self.username or self.email} [{self.role}]'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_claims = instance.token_claims()
+        return instance
+
+    def token_claims(self):
+        return {field: self.__dict__.get(field) for field in self.CLAIM_FIELDS}
+
 
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
@@ -60,8 +74,80 @@ class OneTimeCode(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    LIFETIME_MINUTES = 10
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'purpose', 'is_used', 'created_at'], name='otp_latest_idx'),
+            models.Index(fields=['expires_at'], name='otp_expiry_idx'),
+        ]
+
     def is_expired(self):
         return timezone.now() > self.expires_at
 
     def __str__(self):
-        return f'{self.user_id} - {self.purpose} - {self.code}'
\ No newline at end of file
+        return f'{self.user_id} - {self.purpose} - {self.code}'
+
+    @classmethod
+    def issue(cls, user, purpose, minutes=LIFETIME_MINUTES):
+        """
+        Create a fresh code for `user` and `purpose`. Older unused codes are
+        superseded in one UPDATE, so only the latest code sent can be redeemed.
+        """
+        cls.objects.filter(user_id=user.pk, purpose=purpose, is_used=False).update(is_used=True)
+        return cls.objects.create(
+            user_id=user.pk, purpose=purpose, code=generate_numeric_code(6), expires_at=expiry(minutes)
+        )
+
+    @classmethod
+    def latest_active(cls, user, purpose):
+        """The newest unused code, or None; a single lookup on otp_latest_idx."""
+        return (
+            cls.objects.filter(user_id=user.pk, purpose=purpose, is_used=False)
+            .order_by('-created_at')
+            .first()
+        )
+
+    def consume(self):
+        """Mark the code used. False if a concurrent request redeemed or superseded it first."""
+        consumed = type(self).objects.filter(pk=self.pk, is_used=False).update(is_used=True)
+        self.is_used = True
+        return bool(consumed)
+
+
+class OutboxEmail(models.Model):
+    """
+    Mail queued by request handlers and delivered by `manage.py send_outbox`,
+    so a slow SMTP server never holds up a request.
+    """
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        SENT = 'sent', 'Sent'
+        FAILED = 'failed', 'Failed'
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254, blank=True)
+    recipients = models.JSONField()
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.subject} -> {", ".join(self.recipients)} ({self.status})'
+
+    @classmethod
+    def enqueue(cls, subject, message, recipient_list, from_email=None):
+        """Drop-in for send_mail(): stores the message; it commits or rolls back with the caller."""
+        return cls.objects.create(
+            subject=subject, body=message, from_email=from_email or '', recipients=list(recipient_list)
+        )
@@ -1,12 +1,25 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 from rest_framework import serializers
+from .authentication import db_user
 from .models import Profile, OneTimeCode
 
 
 User = get_user_model()
 
 
+def validate_otp(user, purpose, code, missing='No active code. Request a new one.'):
+    """Check `code` against the user's latest active code for `purpose` and return it."""
+    otp = OneTimeCode.latest_active(user, purpose)
+    if otp is None:
+        raise serializers.ValidationError({'code': missing})
+    if otp.is_expired():
+        raise serializers.ValidationError({'code': 'Code expired. Request a new one.'})
+    if otp.code != code:
+        raise serializers.ValidationError({'code': 'Invalid code.'})
+    return otp
+
+
 class ProfileSerializer(serializers.ModelSerializer):
     class Meta:
         model = Profile
@@ -83,23 +96,8 @@ class ActivationVerifySerializer(serializers.Serializer):
         except User.DoesNotExist:
             raise serializers.ValidationError({'email': 'No account with this email.'})
 
-        otp_qs = OneTimeCode.objects.filter(
-            user=user,
-            purpose=OneTimeCode.Purpose.ACCOUNT_ACTIVATION,
-            is_used=False,
-        ).order_by('-created_at')
-
-        if not otp_qs.exists():
-            raise serializers.ValidationError({'code': 'No active code. Request a new one.'})
-
-        otp = otp_qs.first()
-        if otp.is_expired():
-            raise serializers.ValidationError({'code': 'Code expired. Request a new one.'})
-        if otp.code != code:
-            raise serializers.ValidationError({'code': 'Invalid code.'})
-
         attrs['user'] = user
-        attrs['otp'] = otp
+        attrs['otp'] = validate_otp(user, OneTimeCode.Purpose.ACCOUNT_ACTIVATION, code)
         return attrs
 
 
@@ -161,59 +159,30 @@ class ResetPasswordSerializer(serializers.Serializer):
         except User.DoesNotExist:
             raise serializers.ValidationError({'email': 'No account with this email.'})
 
-        otp_qs = OneTimeCode.objects.filter(
-            user=user,
-            purpose=OneTimeCode.Purpose.PASSWORD_RESET,
-            is_used=False,
-        ).order_by('-created_at')
-
-        if not otp_qs.exists():
-            raise serializers.ValidationError({'code': 'No active code. Request a new one.'})
-
-        otp = otp_qs.first()
-        if otp.is_expired():
-            raise serializers.ValidationError({'code': 'Code expired. Request a new one.'})
-        if otp.code != code:
-            raise serializers.ValidationError({'code': 'Invalid code.'})
-
         attrs['user'] = user
-        attrs['otp'] = otp
+        attrs['otp'] = validate_otp(user, OneTimeCode.Purpose.PASSWORD_RESET, code)
         return attrs
     
 class SendPhoneVerificationSerializer(serializers.Serializer):
     phone_number = serializers.CharField(max_length=20, required=False)
 
     def validate(self, attrs):
-        user = self.context['request'].user
+        user = db_user(self.context['request'].user)
         phone = user.profile.phone_number if hasattr(user, 'profile') else None
         if not phone:
             raise serializers.ValidationError({'phone_number': 'User has no phone number in profile.'})
+        attrs['user'] = user
         return attrs
     
 class PhoneVerifySerializer(serializers.Serializer):
     code = serializers.CharField(max_length=6)
 
     def validate(self, attrs):
-        user = self.context['request'].user
+        user = db_user(self.context['request'].user)
         code = attrs['code']
 
-        otp_qs = OneTimeCode.objects.filter(
-            user=user,
-            purpose=OneTimeCode.Purpose.PHONE_VERIFICATION,
-            is_used=False
-        )
-
-        if not otp_qs.exists():
-            raise serializers.ValidationError({'code': 'No active phone verification code.'})
-
-        otp = otp_qs.first()
-
-        if otp.is_expired():
-            raise serializers.ValidationError({'code': 'Code expired. Request a new one.'})
-
-        if otp.code != code:
-            raise serializers.ValidationError({'code': 'Invalid code.'})
-
         attrs['user'] = user
-        attrs['otp'] = otp
+        attrs['otp'] = validate_otp(
+            user, OneTimeCode.Purpose.PHONE_VERIFICATION, code, missing='No active phone verification code.'
+        )
         return attrs
@@ -1,5 +1,6 @@
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from .authentication import revoke_claims
 from .models import User, Profile
 
 @receiver(post_save, sender=User)
@@ -9,3 +10,11 @@ def create_profile_for_user(sender, instance, created, **kwargs):
     else:
         if hasattr(instance, 'profile'):
             instance.profile.save()
+
+
+@receiver(post_save, sender=User)
+def revoke_stale_token_claims(sender, instance, created, **kwargs):
+    claims = instance.token_claims()
+    if not created and getattr(instance, '_loaded_claims', claims) != claims:
+        revoke_claims(instance.pk)
+    instance._loaded_claims = claims
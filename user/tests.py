@@ -1,3 +1,72 @@
+import uuid
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from .logins import LastLoginBuffer
+from .models import User
+
+
+class PruneTokensTests(TestCase):
+    def outstanding(self, expires_in, blacklisted=False):
+        token = OutstandingToken.objects.create(jti=uuid.uuid4().hex, token='',
+                                                expires_at=timezone.now() + expires_in)
+        if blacklisted:
+            BlacklistedToken.objects.create(token=token)
+        return token
+
+    def test_prunes_expired_tokens_and_their_blacklist_entries(self):
+        expired = [self.outstanding(-timedelta(days=1), blacklisted=n % 2 == 0) for n in range(5)]
+        live = self.outstanding(timedelta(days=1), blacklisted=True)
+        out = StringIO()
+
+        call_command('prune_tokens', batch_size=2, stdout=out)
+
+        self.assertEqual(list(OutstandingToken.objects.values_list('id', flat=True)), [live.pk])
+        self.assertEqual(list(BlacklistedToken.objects.values_list('token_id', flat=True)), [live.pk])
+        self.assertIn(f'Pruned {len(expired)} expired outstanding token(s), 3 of them blacklisted.', out.getvalue())
+
+
+class LastLoginBufferTests(TestCase):
+    def setUp(self):
+        self.buffer = LastLoginBuffer()
+        self.addCleanup(self.buffer.flush)
+
+    def user(self, name, last_login=None):
+        return User.objects.create_user(username=name, email=f'{name}@example.com', password='x',
+                                        last_login=last_login)
+
+    def test_flush_writes_pending_logins(self):
+        first, second = self.user('first'), self.user('second', timezone.now() - timedelta(days=1))
+        now = timezone.now()
+        self.buffer.record(first, now)
+        self.buffer.record(second, now)
+
+        self.assertEqual(self.buffer.flush(), 2)
+
+        self.assertEqual(set(User.objects.values_list('last_login', flat=True)), {now})
+        self.assertEqual(self.buffer.flush(), 0)
+
+    def test_flush_never_moves_last_login_back(self):
+        now = timezone.now()
+        user = self.user('member', now - timedelta(days=1))
+        stale = User.objects.get(pk=user.pk)
+        # Another worker flushed a later login after this one was buffered.
+        self.buffer.record(stale, now - timedelta(hours=1))
+        User.objects.filter(pk=user.pk).update(last_login=now)
+
+        self.assertEqual(self.buffer.flush(), 0)
+
+        user.refresh_from_db()
+        self.assertEqual(user.last_login, now)
+
+    def test_recent_login_is_not_recorded(self):
+        now = timezone.now()
+        user = self.user('member', now - timedelta(seconds=10))
 
-# Create your tests here.
+        self.assertFalse(self.buffer.record(user, now))
+        self.assertEqual(self.buffer.flush(), 0)
@@ -1,5 +1,7 @@
 import random
 from datetime import timedelta
+from django.conf import settings
+from django.core.cache import caches
 from django.utils import timezone
 
 
@@ -8,4 +10,8 @@ def generate_numeric_code(length: int = 6) -> str:
 
 
 def expiry(minutes: int = 10):
-    return timezone.now() + timedelta(minutes=minutes)
\ No newline at end of file
+    return timezone.now() + timedelta(minutes=minutes)
+
+
+def auth_cache():
+    return caches[getattr(settings, 'AUTH_CACHE_ALIAS', 'default')]
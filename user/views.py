@@ -1,22 +1,25 @@
-from django.core.mail import send_mail
 from rest_framework.views import APIView
 from rest_framework.generics import RetrieveUpdateAPIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
-from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model
 
-from .models import OneTimeCode
+from .authentication import ClaimsRefreshToken, db_user
+from .logins import last_login_buffer
+from .models import OneTimeCode, OutboxEmail
 from .serializers import (
     RegisterSerializer, UserPublicSerializer, ProfileSerializer, UserSerializer,
     ActivationSendSerializer, ActivationVerifySerializer,
     LoginSerializer, LogoutSerializer,
     ForgotPasswordSerializer, ResetPasswordSerializer, SendPhoneVerificationSerializer, PhoneVerifySerializer
 )
-from .utils import generate_numeric_code, expiry
+from book.paginators import KeysetCursorPagination
 
 User = get_user_model()
 
+# A resend or a parallel request got to the code between validation and redemption.
+CODE_ALREADY_USED = 'Code already used. Request a new one.'
+
 
 class UserListView(APIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -25,7 +28,13 @@ class UserListView(APIView):
         if request.user.role not in ['admin', 'librarian']:
             return Response({'detail': 'Only admin or librarian can view users.'},status=status.HTTP_403_FORBIDDEN)
 
-        users = User.objects.all()
+        users = User.objects.select_related('profile').order_by('id')
+
+        paginator = KeysetCursorPagination()
+        if paginator.cursor_requested(request):
+            page = paginator.paginate_queryset(users, request, view=self)
+            return paginator.get_paginated_response(UserPublicSerializer(page, many=True).data)
+
         data = UserPublicSerializer(users, many=True).data
         return Response(data, status=status.HTTP_200_OK)
 
@@ -60,13 +69,8 @@ class RegisterView(APIView):
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
 
-        otp = OneTimeCode.objects.create(
-            user=user,
-            purpose=OneTimeCode.Purpose.ACCOUNT_ACTIVATION,
-            code=generate_numeric_code(6),
-            expires_at=expiry(10)
-        )
-        send_mail(
+        otp = OneTimeCode.issue(user, OneTimeCode.Purpose.ACCOUNT_ACTIVATION)
+        OutboxEmail.enqueue(
             subject='Library Activation Code',
             message=f'Your activation code: {otp.code}',
             from_email=None,
@@ -83,13 +87,8 @@ class ResendActivationOTPView(APIView):
         serializer.is_valid(raise_exception=True)
         user = serializer.validated_data['user']
 
-        otp = OneTimeCode.objects.create(
-            user=user,
-            purpose=OneTimeCode.Purpose.ACCOUNT_ACTIVATION,
-            code=generate_numeric_code(6),
-            expires_at=expiry(10)
-        )
-        send_mail(
+        otp = OneTimeCode.issue(user, OneTimeCode.Purpose.ACCOUNT_ACTIVATION)
+        OutboxEmail.enqueue(
             subject='Library Activation Code',
             message=f'Your activation code: {otp.code}',
             from_email=None,
@@ -107,13 +106,13 @@ class VerifyActivationView(APIView):
         user = serializer.validated_data['user']
         otp = serializer.validated_data['otp']
 
+        if not otp.consume():
+            return Response({'code': [CODE_ALREADY_USED]}, status=status.HTTP_400_BAD_REQUEST)
+
         user.is_active = True
         user.email_verified = True
         user.save(update_fields=['is_active', 'email_verified'])
 
-        otp.is_used = True
-        otp.save(update_fields=['is_used'])
-
         return Response({'detail': 'Account activated successfully.'})
 
 
@@ -124,8 +123,9 @@ class LoginView(APIView):
         serializer = LoginSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         user = serializer.validated_data['user']
+        last_login_buffer.record(user)
 
-        refresh = RefreshToken.for_user(user)
+        refresh = ClaimsRefreshToken.for_user(user)
         access = refresh.access_token
 
         return Response({
@@ -141,7 +141,7 @@ class LogoutView(APIView):
     def post(self, request):
         serializer = LogoutSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        token = RefreshToken(serializer.validated_data['refresh'])
+        token = ClaimsRefreshToken(serializer.validated_data['refresh'])
         token.blacklist()
         return Response(status=status.HTTP_205_RESET_CONTENT)
 
@@ -154,13 +154,8 @@ class ForgotPasswordView(APIView):
         serializer.is_valid(raise_exception=True)
         user = serializer.validated_data['user']
 
-        otp = OneTimeCode.objects.create(
-            user=user,
-            purpose=OneTimeCode.Purpose.PASSWORD_RESET,
-            code=generate_numeric_code(6),
-            expires_at=expiry(10)
-        )
-        send_mail(
+        otp = OneTimeCode.issue(user, OneTimeCode.Purpose.PASSWORD_RESET)
+        OutboxEmail.enqueue(
             subject='Library Password Reset Code',
             message=f'Your reset code: {otp.code}',
             from_email=None,
@@ -179,12 +174,12 @@ class ResetPasswordView(APIView):
         otp = serializer.validated_data['otp']
         new_password = serializer.validated_data['new_password']
 
+        if not otp.consume():
+            return Response({'code': [CODE_ALREADY_USED]}, status=status.HTTP_400_BAD_REQUEST)
+
         user.set_password(new_password)
         user.save(update_fields=['password'])
 
-        otp.is_used = True
-        otp.save(update_fields=['is_used'])
-
         return Response({'detail': 'Password reset successful.'})
 
 
@@ -193,7 +188,7 @@ class MeView(RetrieveUpdateAPIView):
     serializer_class = UserPublicSerializer
 
     def get_object(self):
-        return self.request.user
+        return db_user(self.request.user)
 
     def patch(self, request, *args, **kwargs):
         user = self.get_object()
@@ -217,21 +212,10 @@ class SendPhoneVerificationView(APIView):
         serializer = SendPhoneVerificationSerializer(data=request.data, context={'request': request})
         serializer.is_valid(raise_exception=True)
 
-        user = request.user
+        user = serializer.validated_data['user']
         phone_number = user.profile.phone_number
 
-        OneTimeCode.objects.filter(
-            user=user,
-            purpose=OneTimeCode.Purpose.PHONE_VERIFICATION,
-            is_used=False
-        ).delete()
-
-        otp = OneTimeCode.objects.create(
-            user=user,
-            purpose=OneTimeCode.Purpose.PHONE_VERIFICATION,
-            code=generate_numeric_code(6),
-            expires_at=expiry(10)
-        )
+        OneTimeCode.issue(user, OneTimeCode.Purpose.PHONE_VERIFICATION)
         return Response({'detail': f'Verification code sent to {phone_number}.'}, status=status.HTTP_200_OK)
 
 
@@ -243,12 +227,12 @@ class VerifyPhoneView(APIView):
         serializer.is_valid(raise_exception=True)
 
         otp = serializer.validated_data['otp']
-        user = request.user
+        user = serializer.validated_data['user']
+
+        if not otp.consume():
+            return Response({'code': [CODE_ALREADY_USED]}, status=status.HTTP_400_BAD_REQUEST)
 
         user.phone_verified = True
         user.save(update_fields=['phone_verified'])
 
-        otp.is_used = True
-        otp.save(update_fields=['is_used'])
-
         return Response({'detail': 'Phone number verified successfully.'}, status=status.HTTP_200_OK)